@@ -0,0 +1,245 @@
+from oklo.core.ids import ReactionId, NuclideIdArray
+from oklo.core.defs import ReactionType, reaction_offset_table
+from oklo.core.units import MeV, me
+import numpy
+##########################################################################
+
+# Atomic mass excess of light particles, AME2012
+neutron_mass_excess = 8.0713171 * MeV
+hydrogen_mass_excess = 7.28897061 * MeV
+helium4_mass_excess = 2.42491561 * MeV
+
+# Mass-energy of light particles absorbed, less that of those emitted, in
+# each reaction type.  The Q-value is then the initial less the final
+# atomic mass excess, plus this offset.
+reaction_q_offset_table = {
+    ReactionType.AlphaDecay:-helium4_mass_excess,
+    ReactionType.BetaDecay:0,
+    getattr(ReactionType, 'Beta+Decay'):-2*me,
+    ReactionType.BetaNeutronDecay:-neutron_mass_excess,
+    ReactionType.GammaDecay:0,
+    ReactionType.NeutronCapture:neutron_mass_excess,
+    ReactionType.p_n:hydrogen_mass_excess - neutron_mass_excess,
+    ReactionType.n_p:neutron_mass_excess - hydrogen_mass_excess,
+}
+
+##########################################################################
+
+class NuclideChart(object):
+    '''Chart of nuclides: nuclide properties stored on dense (Z, N, M)
+       grids, indexed by proton number, neutron number and isomer level.
+
+       Looking up a property for many nuclides, or for the neighbours
+       reached by a reaction (e.g. Z+1 for beta decay), is a single
+       fancy-indexing operation.  Properties which are unknown, or
+       outside the chart, are NaN.
+    '''
+    # Standard properties, and their sources
+    #   mass_excess: MassEvaluation, or nuclide['mass_excess']
+    #   half_life, q_value: BetaSpectrumENDF, or reaction['beta_decay']
+    properties = ('mass_excess', 'half_life', 'q_value')
+
+    def __init__(self, Z_max=118, N_max=180, M_max=3):
+        '''Constructor.  Creates an empty chart of the given size.'''
+        self._shape = (Z_max+1, N_max+1, M_max+1)
+        self._known = numpy.zeros(self._shape, dtype=bool)
+        self._grids = {}
+        for name in self.properties:
+            self._grids[name] = numpy.empty(self._shape)
+            self._grids[name].fill(numpy.nan)
+        return
+
+    @classmethod
+    def from_network(cls, network):
+        '''Build chart from the nuclides and beta decays in a network'''
+        nucl_ids = network.nuclide_ids()
+        decays = [reaction['beta_decay']
+                  for reaction in network.reactions_with('beta_decay')]
+        chart = cls._sized_for([nucl_ids] + [NuclideIdArray(
+            [decay.reaction_id.initial_nuclide_id for decay in decays])])
+        chart.add_nuclides(nucl_ids)
+        (mass_ids, mass_excess) = network.nuclide_column('mass_excess')
+        chart.set('mass_excess', mass_ids, mass_excess)
+        chart._set_decays(decays)
+        return chart
+
+    @classmethod
+    def from_models(cls, mass_model=None, decay_model=None):
+        '''Build chart from a MassEvaluation and/or BetaSpectrumENDF'''
+        (mass_ids, mass_excess) = (NuclideIdArray(), numpy.zeros(0))
+        if mass_model is not None:
+            (mass_ids, mass_excess) = mass_model.mass_excess_table()
+        decays = []
+        if decay_model is not None:
+            decays = decay_model.decays()
+        decay_ids = NuclideIdArray([decay.reaction_id.initial_nuclide_id
+                                    for decay in decays])
+        chart = cls._sized_for([mass_ids, decay_ids])
+        chart.add_nuclides(mass_ids)
+        chart.add_nuclides(decay_ids)
+        chart.set('mass_excess', mass_ids, mass_excess)
+        chart._set_decays(decays)
+        return chart
+
+    @classmethod
+    def _sized_for(cls, id_arrays):
+        '''Return an empty chart large enough for these nuclides'''
+        Z_max = N_max = M_max = 0
+        for nucl_ids in id_arrays:
+            if len(nucl_ids) < 1: continue
+            Z_max = max(Z_max, nucl_ids.Z.max())
+            N_max = max(N_max, nucl_ids.N.max())
+            M_max = max(M_max, nucl_ids.M.max())
+        return cls(Z_max, N_max, M_max)
+
+    def _set_decays(self, decays):
+        '''Set half life and Q-value of the initial nuclide of decays'''
+        decay_ids = NuclideIdArray([decay.reaction_id.initial_nuclide_id
+                                    for decay in decays])
+        self.set('half_life', decay_ids,
+                 [decay.half_life for decay in decays])
+        self.set('q_value', decay_ids, [decay.q_value for decay in decays])
+        return
+
+    @property
+    def shape(self):
+        '''Return the (Z, N, M) size of the chart'''
+        return self._shape
+
+    def grid(self, name):
+        '''Return the dense (Z, N, M) grid of a property'''
+        return self._grids[name]
+
+    @property
+    def known(self):
+        '''Return the dense (Z, N, M) grid of chart membership'''
+        return self._known
+
+    def index(self, nucl_ids):
+        '''Return the (Z, N, M) index arrays of these nuclides, and a mask
+           of which nuclides lie within the chart'''
+        nucl_ids = NuclideIdArray(nucl_ids)
+        (Z, N, M) = (nucl_ids.Z, nucl_ids.N, nucl_ids.M)
+        inside = ((Z >= 0) & (Z < self._shape[0])
+                  & (N >= 0) & (N < self._shape[1])
+                  & (M >= 0) & (M < self._shape[2]))
+        return ((Z, N, M), inside)
+
+    def add_nuclides(self, nucl_ids):
+        '''Mark these nuclides as members of the chart'''
+        ((Z, N, M), inside) = self.index(nucl_ids)
+        if not inside.all():
+            raise ValueError('Nuclides outside chart of shape %r'
+                             % (self._shape,))
+        self._known[Z, N, M] = True
+        return
+
+    def set(self, name, nucl_ids, values):
+        '''Set a property for these nuclides'''
+        if not self._grids.has_key(name):
+            self._grids[name] = numpy.empty(self._shape)
+            self._grids[name].fill(numpy.nan)
+        ((Z, N, M), inside) = self.index(nucl_ids)
+        if not inside.all():
+            raise ValueError('Nuclides outside chart of shape %r'
+                             % (self._shape,))
+        self._grids[name][Z, N, M] = values
+        return
+
+    def get(self, name, nucl_ids):
+        '''Return a property for these nuclides'''
+        ((Z, N, M), inside) = self.index(nucl_ids)
+        values = numpy.empty(len(Z))
+        values.fill(numpy.nan)
+        values[inside] = self._grids[name][Z[inside], N[inside], M[inside]]
+        return values
+
+    def has(self, nucl_ids):
+        '''Return mask of which nuclides are members of the chart'''
+        ((Z, N, M), inside) = self.index(nucl_ids)
+        known = numpy.zeros(len(Z), dtype=bool)
+        known[inside] = self._known[Z[inside], N[inside], M[inside]]
+        return known
+
+    def nuclide_ids(self):
+        '''Return the ids of all members of the chart'''
+        (Z, N, M) = numpy.nonzero(self._known)
+        return NuclideIdArray.from_zam(Z, Z+N, M)
+
+    def q_values(self, reac_type, nucl_ids=None):
+        '''Return (final ids, Q-values, allowed mask) of a reaction type
+           from these initial nuclides (by default, all members of the
+           chart).  Q-values are NaN where either mass is unknown, and
+           such reactions are not allowed.'''
+        if nucl_ids is None:
+            nucl_ids = self.nuclide_ids()
+        final_nucl_ids = final_nuclide_ids(nucl_ids, reac_type)
+        q_values = (self.get('mass_excess', nucl_ids)
+                    - self.get('mass_excess', final_nucl_ids)
+                    + reaction_q_offset_table[reac_type])
+        with numpy.errstate(invalid='ignore'):
+            allowed = q_values > 0
+        return (final_nucl_ids, q_values, allowed)
+
+    def q_value_matrix(self, reac_types=None, nucl_ids=None):
+        '''Return (Q-values, allowed mask) of several reaction types (by
+           default, all with known final nuclides) from these initial
+           nuclides, as arrays of shape (reaction types, nuclides)'''
+        if reac_types is None:
+            reac_types = sorted(reaction_offset_table.keys())
+        if nucl_ids is None:
+            nucl_ids = self.nuclide_ids()
+        nucl_ids = NuclideIdArray(nucl_ids)
+        offsets = numpy.array([reaction_offset_table[reac_type]
+                               for reac_type in reac_types],
+                              dtype=numpy.int64).reshape((-1, 2))
+        q_offsets = numpy.array([reaction_q_offset_table[reac_type]
+                                 for reac_type in reac_types], dtype=float)
+        # Broadcast (types, 1) offsets against (nuclides,) numbers; final
+        # nuclides are ground states
+        Z = nucl_ids.Z + offsets[:, 0:1]
+        N = nucl_ids.N + (offsets[:, 1:2] - offsets[:, 0:1])
+        inside = ((Z >= 0) & (Z < self._shape[0])
+                  & (N >= 0) & (N < self._shape[1]))
+        final_mass_excess = numpy.empty(Z.shape)
+        final_mass_excess.fill(numpy.nan)
+        final_mass_excess[inside] = self._grids['mass_excess'][
+            Z[inside], N[inside], 0]
+        q_values = (self.get('mass_excess', nucl_ids)
+                    - final_mass_excess + q_offsets[:, numpy.newaxis])
+        with numpy.errstate(invalid='ignore'):
+            allowed = q_values > 0
+        return (q_values, allowed)
+
+    def candidate_reactions(self, reac_types=None, threshold=0,
+                            nucl_ids=None):
+        '''Return ReactionIds of the energetically allowed reactions with
+           Q-value of at least threshold, in order of reaction type'''
+        if reac_types is None:
+            reac_types = sorted(reaction_offset_table.keys())
+        if nucl_ids is None:
+            nucl_ids = self.nuclide_ids()
+        nucl_ids = NuclideIdArray(nucl_ids)
+        (q_values, allowed) = self.q_value_matrix(reac_types, nucl_ids)
+        with numpy.errstate(invalid='ignore'):
+            selected = allowed & (q_values >= threshold)
+        reac_ids = []
+        for (reac_type, type_selected) in zip(reac_types, selected):
+            for nucl_id in nucl_ids[type_selected]:
+                reac_ids.append(ReactionId(init_nucl_id=nucl_id,
+                                           reac_type=reac_type))
+        return reac_ids
+
+##########################################################################
+
+def final_nuclide_ids(nucl_ids, reac_type):
+    '''Return the (ground state) final nuclides reached from these initial
+       nuclides by a reaction type, as ReactionId does for one nuclide'''
+    if not reaction_offset_table.has_key(reac_type):
+        raise ValueError('Cannot determine final nuclide for reaction type %r'
+                         % reac_type)
+    (dZ, dA) = reaction_offset_table[reac_type]
+    nucl_ids = NuclideIdArray(nucl_ids)
+    return NuclideIdArray.from_zam(nucl_ids.Z + dZ, nucl_ids.A + dA, 0)
+
+##########################################################################
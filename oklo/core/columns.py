@@ -0,0 +1,231 @@
+import numbers
+import numpy
+##########################################################################
+
+class ColumnTable(object):
+    '''Properties of many nuclides or reactions, stored by column.
+
+       Each element is a dense row number.  Scalar properties are kept in
+       typed numpy columns (bool, int64 or float64), and any other value
+       (e.g. a dictionary of fission yields, or a BetaDecaySpectrum) in an
+       object column.  A boolean mask per column records which rows have
+       the property, so network-wide queries become vectorized masks.
+    '''
+    def __init__(self):
+        '''Constructor'''
+        self._ids = []
+        self._capacity = 0
+        self._live = numpy.zeros(0, dtype=bool)
+        self._values = {}
+        self._present = {}
+        return
+
+    def __len__(self):
+        '''Return the number of rows, including removed rows'''
+        return len(self._ids)
+
+    @property
+    def ids(self):
+        '''Return the element id of each row'''
+        return self._ids
+
+    @property
+    def live(self):
+        '''Return mask of the rows which have not been removed'''
+        return self._live[:len(self._ids)]
+
+    def column_names(self):
+        '''Return the names of all columns'''
+        return self._values.keys()
+
+    def add_row(self, id):
+        '''Add an empty row for this element id, and return its number'''
+        row = len(self._ids)
+        if row >= self._capacity:
+            self._grow(max(16, 2*self._capacity))
+        self._ids.append(id)
+        self._live[row] = True
+        return row
+
+    def remove_row(self, row):
+        '''Remove all properties of a row, and mark it removed'''
+        for key in self.keys(row):
+            self.delete(row, key)
+        self._live[row] = False
+        return
+
+    def get(self, row, key):
+        '''Return the value of property key for a row'''
+        if not self.has(row, key):
+            raise KeyError(key)
+        value = self._values[key][row]
+        if self._values[key].dtype != object:
+            return value.item()
+        return value
+
+    def set(self, row, key, value):
+        '''Set the value of property key for a row'''
+        if not self._values.has_key(key):
+            self._values[key] = numpy.zeros(self._capacity,
+                                            dtype=_column_dtype(value))
+            self._present[key] = numpy.zeros(self._capacity, dtype=bool)
+        else:
+            self._promote(key, value)
+        self._values[key][row] = value
+        self._present[key][row] = True
+        return
+
+    def has(self, row, key):
+        '''Check if a row has property key'''
+        return bool(self._present.has_key(key) and self._present[key][row])
+
+    def delete(self, row, key):
+        '''Remove property key from a row'''
+        if not self.has(row, key):
+            raise KeyError(key)
+        self._present[key][row] = False
+        if self._values[key].dtype == object:
+            # Release the reference
+            self._values[key][row] = None
+        return
+
+    def keys(self, row):
+        '''Return the names of the properties of a row'''
+        return [key for (key, present) in self._present.items()
+                if present[row]]
+
+    def column(self, key):
+        '''Return (values, mask) arrays of property key over all rows.
+           Values are undefined where the mask is false.'''
+        n_rows = len(self._ids)
+        if not self._values.has_key(key):
+            return (numpy.zeros(n_rows), numpy.zeros(n_rows, dtype=bool))
+        return (self._values[key][:n_rows], self._present[key][:n_rows])
+
+    def mask(self, *keys):
+        '''Return mask of the rows which have all of these properties'''
+        mask = self.live.copy()
+        for key in keys:
+            mask &= self.column(key)[1]
+        return mask
+
+    def _grow(self, capacity):
+        '''Increase the number of allocated rows'''
+        def resize(array):
+            grown = numpy.zeros(capacity, dtype=array.dtype)
+            grown[:len(array)] = array
+            return grown
+        self._live = resize(self._live)
+        for key in self._values.keys():
+            self._values[key] = resize(self._values[key])
+            self._present[key] = resize(self._present[key])
+        self._capacity = capacity
+        return
+
+    def _promote(self, key, value):
+        '''Widen the column type if needed to hold value'''
+        values = self._values[key]
+        dtype = _column_dtype(value)
+        if values.dtype == object or values.dtype == dtype:
+            return
+        if values.dtype == numpy.float64 and dtype == numpy.int64:
+            return
+        if values.dtype == numpy.int64 and dtype == numpy.float64:
+            self._values[key] = values.astype(numpy.float64)
+            return
+        # Fall back to an object column, keeping python scalars
+        present = self._present[key]
+        promoted = numpy.zeros(len(values), dtype=object)
+        promoted[present] = values[present].tolist()
+        self._values[key] = promoted
+        return
+
+def _column_dtype(value):
+    '''Return the column type suitable for value'''
+    if isinstance(value, (bool, numpy.bool_)):
+        return bool
+    if isinstance(value, numbers.Integral):
+        return numpy.int64
+    if isinstance(value, numbers.Real):
+        return numpy.float64
+    return object
+
+##########################################################################
+
+class ColumnView(object):
+    '''Dictionary-like view of one row of a ColumnTable, standing in for
+       a DataContainer in a columnar ReactionNetwork'''
+    __slots__ = ('_table', '_row', '_id')
+
+    def __init__(self, table, row, id):
+        '''Constructor'''
+        self._table = table
+        self._row = row
+        self._id = id
+        return
+
+    @property
+    def id(self):
+        '''Return the unique ID for this data object'''
+        return self._id
+
+    @property
+    def row(self):
+        '''Return the row number of this element in its table'''
+        return self._row
+
+    def is_nuclide(self):
+        '''Allow others to ask if this is nuclide data'''
+        return False
+
+    def is_reaction(self):
+        '''Allow others to ask if this is reaction data'''
+        return False
+
+    def __getitem__(self, key):
+        return self._table.get(self._row, key)
+
+    def __setitem__(self, key, value):
+        self._table.set(self._row, key, value)
+        return
+
+    def __delitem__(self, key):
+        self._table.delete(self._row, key)
+        return
+
+    def __contains__(self, key):
+        return self._table.has(self._row, key)
+
+    def has_key(self, key):
+        return self._table.has(self._row, key)
+
+    def get(self, key, default=None):
+        if not self._table.has(self._row, key):
+            return default
+        return self._table.get(self._row, key)
+
+    def keys(self):
+        return self._table.keys(self._row)
+
+    def values(self):
+        return [self[key] for key in self.keys()]
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    def update(self, values):
+        for (key, value) in dict(values).items():
+            self[key] = value
+        return
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def __repr__(self):
+        return '%s(%s, %r)' % (self.__class__.__name__, self._id,
+                               dict(self.items()))
+
+##########################################################################
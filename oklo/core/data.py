@@ -1,12 +1,21 @@
 ##########################################################################
 
-class DataContainer(dict):
+class DataContainer(object):
     '''A dictionary-like container for data associated to a nuclide or reaction
+
+    Entries may be lazy: a function registered with set_lazy() provides
+    the values of some keys, and is called the first time any of them is
+    accessed.  Its results are then stored as ordinary entries.  All
+    dictionary methods see lazy entries, evaluating them as needed.
     '''
+    # Mutable, like a dictionary
+    __hash__ = None
+
     def __init__(self, id):
         '''Constructor'''
-        dict.__init__(self)
         self._id = id
+        self._data = {}
+        self._lazy = {}
 
     @property
     def id(self):
@@ -20,3 +29,138 @@ class DataContainer(dict):
     def is_reaction(self):
         '''Allow others to ask if this is reaction data'''
         return False
+
+    def set_lazy(self, keys, thunk):
+        '''Register thunk to provide the values of these keys.  On first
+           access to any of them, thunk(self) is called once, and should
+           set their values (or leave unset those it cannot provide).'''
+        for key in keys:
+            if not self._data.has_key(key):
+                self._lazy[key] = thunk
+        return
+
+    def is_lazy(self, key):
+        '''Check if the value of key has not yet been evaluated'''
+        return self._lazy.has_key(key)
+
+    def evaluate(self, key=None):
+        '''Evaluate the lazy entry for key, or all lazy entries'''
+        if key is None:
+            while self._lazy:
+                self.evaluate(self._lazy.keys()[0])
+            return
+        thunk = self._lazy.get(key)
+        if thunk is None:
+            return
+        # Unregister all keys of this thunk before calling it, so that
+        # it is called only once, and may set its keys normally
+        for other_key in [other_key for (other_key, other_thunk)
+                          in self._lazy.items() if other_thunk is thunk]:
+            del self._lazy[other_key]
+        thunk(self)
+        return
+
+    def __getitem__(self, key):
+        if self._lazy and self._lazy.has_key(key):
+            self.evaluate(key)
+        return self._data[key]
+
+    def __setitem__(self, key, value):
+        if self._lazy:
+            # Explicit values replace lazy ones
+            self._lazy.pop(key, None)
+        self._data[key] = value
+
+    def __delitem__(self, key):
+        if not self.__contains__(key):
+            raise KeyError(key)
+        del self._data[key]
+
+    def __contains__(self, key):
+        if self._data.has_key(key):
+            return True
+        if self._lazy.has_key(key):
+            self.evaluate(key)
+            return self._data.has_key(key)
+        return False
+
+    def has_key(self, key):
+        return self.__contains__(key)
+
+    def get(self, key, default=None):
+        if self.__contains__(key):
+            return self._data[key]
+        return default
+
+    def setdefault(self, key, default=None):
+        if not self.__contains__(key):
+            self[key] = default
+        return self._data[key]
+
+    def pop(self, key, *default):
+        if self.__contains__(key):
+            return self._data.pop(key)
+        if default:
+            return default[0]
+        raise KeyError(key)
+
+    def update(self, *args, **kwargs):
+        for (key, value) in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def clear(self):
+        self._lazy.clear()
+        self._data.clear()
+
+    def copy(self):
+        '''Return a dictionary of all entries'''
+        self.evaluate()
+        return self._data.copy()
+
+    def keys(self):
+        self.evaluate()
+        return self._data.keys()
+
+    def values(self):
+        self.evaluate()
+        return self._data.values()
+
+    def items(self):
+        self.evaluate()
+        return self._data.items()
+
+    def iterkeys(self):
+        self.evaluate()
+        return self._data.iterkeys()
+
+    def itervalues(self):
+        self.evaluate()
+        return self._data.itervalues()
+
+    def iteritems(self):
+        self.evaluate()
+        return self._data.iteritems()
+
+    def __iter__(self):
+        self.evaluate()
+        return iter(self._data)
+
+    def __len__(self):
+        self.evaluate()
+        return len(self._data)
+
+    def __eq__(self, other):
+        if isinstance(other, DataContainer):
+            other = other.copy()
+        elif not isinstance(other, dict):
+            return NotImplemented
+        return self.copy() == other
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        if equal is NotImplemented:
+            return equal
+        return not equal
+
+    def __repr__(self):
+        return repr(self.copy())
@@ -16,3 +16,14 @@ ReactionType = enum('Unknown',
                     'p_n',
                     'n_p')
 
+# Change in (Z, A) from the initial to the final nuclide of each reaction
+reaction_offset_table = {
+    ReactionType.AlphaDecay:(-2, -4),
+    ReactionType.BetaDecay:(1, 0),
+    getattr(ReactionType, 'Beta+Decay'):(-1, 0),
+    ReactionType.BetaNeutronDecay:(1, -1),
+    ReactionType.GammaDecay:(0, 0),
+    ReactionType.NeutronCapture:(0, 1),
+    ReactionType.p_n:(1, 0),
+    ReactionType.n_p:(-1, 0),
+}
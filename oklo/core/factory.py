@@ -1,26 +1,52 @@
 from oklo.core.ids import NuclideId, ReactionId
 from oklo.core.nuclide import Nuclide
 from oklo.core.reaction import Reaction
+import time
 ##########################################################################    
 
 class Factory(object):
     '''Generic factory for building networks based on set of models'''
-    def __init__(self, name='Unknown', model_list=[], extend_network=True):
-        '''Constructor'''
+    def __init__(self, name='Unknown', model_list=[], extend_network=True,
+                 depends_on=[], lazy=False):
+        '''Constructor.  Depends_on lists the names of the factories
+           whose data must be in the network before this factory
+           processes it (see oklo.core.pipeline).  If lazy is set,
+           elements are processed only when a key the model provides is
+           first accessed (see DataContainer.set_lazy).'''
         self._name = name
         self._default_model = None
         self._model_by_id = {}
+        self._models = []
+        self._default_models = []
+        self._scoped_ids = set()
         self._known_ids = None
         self._load_models(model_list)
         self._extend_network = extend_network
+        self._depends_on = list(depends_on)
+        self._lazy = lazy
         return
 
     @property
     def name(self):
         return self._name
+
+    @property
+    def depends_on(self):
+        '''Return the names of the factories this factory depends on'''
+        return self._depends_on
+
+    def models(self):
+        '''Return the distinct models used by this factory'''
+        return self._models
     
     def known_ids(self):
-        '''Get the set of ids known to this factory'''
+        '''Get the set of ids known to this factory.  Collected on first
+           use, so that models need not load their data until then.'''
+        if self._known_ids is None:
+            known_ids = set(self._scoped_ids)
+            for model in self._default_models:
+                known_ids.update(model.known_ids())
+            self._known_ids = known_ids
         return self._known_ids
     
     def process_element(self, element):
@@ -38,38 +64,78 @@ class Factory(object):
         raise ValueError('No model for processing: %r' % id)
 
     def process(self, network):
-        '''Process a reaction network with this factory'''
+        '''Process a reaction network with this factory.  Returns a
+           dictionary of statistics: the number of elements added to and
+           processed in the network, and the time taken for each.'''
+        stats = {'added':0, 'processed':0, 'deferred':0,
+                 'extend_time':0., 'process_time':0.}
         # Extend network with new nuclides or reactions, if requested
         if self._extend_network:
-            new_elements = []
-            for id in self._known_ids:
-                if id not in network.known_ids():
-                    element = self._make_element(id)
-                    new_elements.append(element)
-            network.add(new_elements)
+            stats.update(self.extend(network))
         # Process each element in network
+        stats.update(self.process_elements(network))
+        return stats
+
+    def extend(self, network):
+        '''Add the elements known to this factory which are missing from
+           the network.  Returns statistics, as process().'''
+        start_time = time.time()
+        new_ids = self.known_ids().difference(network.known_ids())
+        # Add in sorted order, so the network need not re-sort
+        new_elements = [self._make_element(id) for id in sorted(new_ids)]
+        network.add(new_elements)
+        return {'added':len(new_elements),
+                'extend_time':time.time() - start_time}
+
+    def process_elements(self, network):
+        '''Process each element in the network, or defer processing in
+           lazy mode.  Returns statistics, as process(), and the number
+           of elements deferred.'''
+        start_time = time.time()
+        n_processed = 0
+        n_deferred = 0
         for element in self._get_elements(network):
-            self.process_element(element)
-        return
+            if self._lazy and self._defer_element(element):
+                n_deferred += 1
+            else:
+                self.process_element(element)
+                n_processed += 1
+        network.data_changed()
+        return {'processed':n_processed, 'deferred':n_deferred,
+                'process_time':time.time() - start_time}
+
+    def _defer_element(self, element):
+        '''Register the model process as a lazy entry of element, if
+           possible.  Returns True if deferred.'''
+        if not hasattr(element, 'set_lazy'):
+            # e.g. views of a columnar network
+            return False
+        model = self.get_model(element.id)
+        keys = model.provides()
+        if keys is None:
+            return False
+        element.set_lazy(keys, model.process)
+        return True
     
     def _load_models(self, model_list):
         '''Process model list.  Specifies mapping of ids to models'''
         # Build association between id and model
-        known_ids = set()
         for model_info in model_list:
             # Lookup model from current active configuration
             model = model_info['model']
+            if model not in self._models:
+                self._models.append(model)
             # Set model scope
             scope = model_info['scope']
             if scope is 'default':
                 self._default_model = model
-                known_ids.update(model.known_ids())
+                # Known ids are collected on first use
+                self._default_models.append(model)
             else:
                 for name in scope:
-                    id = _make_id(name)
+                    id = self._make_id(name)
                     self._model_by_id[id] = model
-                    known_ids.add(id)
-        self._known_ids = known_ids
+                    self._scoped_ids.add(id)
         return
 
     def _make_element(self, id):
@@ -1,5 +1,6 @@
 from oklo.core.elements import element_name_table, element_Z_table
-from oklo.core.defs import ReactionType
+from oklo.core.defs import ReactionType, reaction_offset_table
+import numpy
 ##########################################################################
 
 class NuclideId(object):
@@ -7,25 +8,41 @@ class NuclideId(object):
        - Proton number, Z
        - Nucleon number, A
        - Isomer index, M (zero for ground state)
+    Only one instance exists for each nuclide; constructing the same
+    nuclide again returns the existing instance.
     '''
-    def __init__(self, name=None, Z=None, A=None, M=None, id=None,
-                 endf_id=None):
+    __slots__ = ('_id', '_Z', '_A', '_M', '_element_name')
+    # Canonical instance for each nuclide ID integer
+    _instances = {}
+
+    def __new__(cls, name=None, Z=None, A=None, M=None, id=None,
+                endf_id=None):
         '''Constructor.  Specify either name, (z,n,m), or ID'''
         if id:
             # Define by ID
-            self._id = id
+            id = int(id)
         elif None not in (Z, A):
             # Define by (Z,A,(M))
             if not M: M=0
-            self._id = NuclideId._zam_to_id(Z,A,M)
+            id = NuclideId._zam_to_id(Z,A,M)
         elif name:
-            self._id = NuclideId._name_to_id(name)
+            id = NuclideId._name_to_id(name)
         elif endf_id:
-            self._id = NuclideId._endf_to_id(endf_id)
+            id = NuclideId._endf_to_id(endf_id)
         else:
             raise ValueError('Invalid nuclide definition: Z=%r, A=%r, M=%r, id=%r' % (Z,A,M,id))
-        self._element_name = element_name_table[self.Z]
-        return
+        instance = NuclideId._instances.get(id)
+        if instance is not None:
+            return instance
+        instance = object.__new__(cls)
+        instance._id = id
+        (instance._Z, instance._A, instance._M) = NuclideId._id_to_zam(id)
+        instance._element_name = element_name_table[instance._Z]
+        return NuclideId._instances.setdefault(id, instance)
+
+    def __reduce__(self):
+        '''Pickle by ID, so unpickling returns the canonical instance'''
+        return (NuclideId, (None, None, None, None, self._id))
         
     @classmethod
     def _id_to_zam(cls, id):
@@ -64,22 +81,22 @@ class NuclideId(object):
     @property
     def Z(self):
         '''Return number of protons (Z) for this Nuclide ID'''
-        return NuclideId._id_to_zam(self._id)[0]
+        return self._Z
 
     @property
     def A(self):
         '''Return number of nucleons (A) for this Nuclide ID'''
-        return NuclideId._id_to_zam(self._id)[1]
+        return self._A
 
     @property
     def M(self):
         '''Return metastable nuclear isomer level (M) for this Nuclide ID'''
-        return NuclideId._id_to_zam(self._id)[2]
+        return self._M
 
     @property
     def N(self):
         '''Return the neutron number (N) for this Nuclide ID'''
-        return self.A - self.Z
+        return self._A - self._Z
 
     def __hash__(self):
         '''Define hash comparison based on nuclide ID'''
@@ -89,12 +106,37 @@ class NuclideId(object):
         '''Compare two Nuclide IDs'''
         return self._id.__cmp__(other._id)
 
+    def __eq__(self, other):
+        '''Check equality of two Nuclide IDs'''
+        return self is other or (isinstance(other, NuclideId)
+                                 and self._id == other._id)
+
+    def __ne__(self, other):
+        '''Check inequality of two Nuclide IDs'''
+        return not self.__eq__(other)
+
+    def __lt__(self, other):
+        '''Check if this Nuclide ID is less than another'''
+        return self._id < other._id
+
+    def __le__(self, other):
+        '''Check if this Nuclide ID is less than or equal to another'''
+        return self._id <= other._id
+
+    def __gt__(self, other):
+        '''Check if this Nuclide ID is greater than another'''
+        return self._id > other._id
+
+    def __ge__(self, other):
+        '''Check if this Nuclide ID is greater than or equal to another'''
+        return self._id >= other._id
+
     def __str__(self):
         '''Return string representation of nuclide ID'''
-        name_str = self.element_name
-        name_str += '_%d' % self.A
-        if self.M > 0:
-            name_str += '_m%d' % self.M
+        name_str = self._element_name[0]
+        name_str += '_%d' % self._A
+        if self._M > 0:
+            name_str += '_m%d' % self._M
         return name_str
 
     @property
@@ -119,6 +161,164 @@ class NuclideId(object):
 
 ##########################################################################
 
+# Element names and abbreviations indexed by proton number
+_element_names = numpy.array([element_name_table[Z][0]
+                              for Z in sorted(element_name_table.keys())])
+_element_abbrevs = numpy.array([element_name_table[Z][1]
+                                for Z in sorted(element_name_table.keys())])
+
+class NuclideIdArray(object):
+    '''A collection of nuclide identifiers, stored as a numpy array of
+       Nuclide ID integers (ZZZAAAM) rather than as NuclideId objects.
+    '''
+    def __init__(self, ids=()):
+        '''Constructor.  Specify a sequence of NuclideIds or ID integers'''
+        if isinstance(ids, NuclideIdArray):
+            ids = ids._ids
+        elif not isinstance(ids, numpy.ndarray):
+            ids = [_as_id_int(nucl_id) for nucl_id in ids]
+        self._ids = numpy.array(ids, dtype=numpy.int64).reshape(-1)
+        self._unique_ids = None
+        return
+
+    @classmethod
+    def from_zam(cls, Z, A, M=0):
+        '''Construct from arrays of (proton, nucleon, isomer) numbers'''
+        (Z, A, M) = numpy.broadcast_arrays(numpy.asarray(Z, dtype=numpy.int64),
+                                           numpy.asarray(A, dtype=numpy.int64),
+                                           numpy.asarray(M, dtype=numpy.int64))
+        return cls(Z*10000 + A*10 + M)
+
+    @classmethod
+    def from_names(cls, names):
+        '''Construct from nuclide names ('Elem_A_mM' notation)'''
+        return cls(numpy.array([NuclideId._name_to_id(name)
+                                for name in names], dtype=numpy.int64))
+
+    @classmethod
+    def from_endf(cls, endf_names):
+        '''Construct from ENDF (ZZZAAAM) strings or integers'''
+        return cls(numpy.asarray(endf_names).astype(numpy.int64))
+
+    @property
+    def ids(self):
+        '''Return the Nuclide ID integers'''
+        return self._ids
+
+    @property
+    def Z(self):
+        '''Return numbers of protons (Z)'''
+        return self._ids // 10000
+
+    @property
+    def A(self):
+        '''Return numbers of nucleons (A)'''
+        return (self._ids % 10000) // 10
+
+    @property
+    def M(self):
+        '''Return metastable nuclear isomer levels (M)'''
+        return self._ids % 10
+
+    @property
+    def N(self):
+        '''Return neutron numbers (N)'''
+        return self.A - self.Z
+
+    @property
+    def endf_name(self):
+        '''Return ENDF string representations (ZZZAAAM)'''
+        return numpy.char.zfill(self._ids.astype(str), 7)
+
+    @property
+    def name(self):
+        '''Return string representations (Element_AAA(_mM))'''
+        M = self.M
+        isomer = numpy.where(M > 0,
+                             numpy.char.add('_m', M.astype(str)), '')
+        return numpy.char.add(
+            numpy.char.add(numpy.char.add(_element_names[self.Z], '_'),
+                           self.A.astype(str)),
+            isomer)
+
+    @property
+    def element_abbrev(self):
+        '''Return element abbreviations (e.g. H)'''
+        return _element_abbrevs[self.Z]
+
+    def nuclide_ids(self):
+        '''Return list of NuclideId objects'''
+        return [NuclideId(id=nucl_id) for nucl_id in self._ids.tolist()]
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __iter__(self):
+        for nucl_id in self._ids.tolist():
+            yield NuclideId(id=nucl_id)
+
+    def __getitem__(self, key):
+        '''Return NuclideId for an index, or NuclideIdArray for a slice,
+           mask or index array'''
+        if isinstance(key, (int, numpy.integer)):
+            return NuclideId(id=self._ids[key])
+        return NuclideIdArray(self._ids[key])
+
+    def __repr__(self):
+        return 'NuclideIdArray(%r)' % (list(self.name),)
+
+    def __contains__(self, nucl_id):
+        '''Check if nuclide is in this collection'''
+        return bool(self.contains([_as_id_int(nucl_id)])[0])
+
+    def contains(self, other):
+        '''Return mask of which nuclides in other are in this collection'''
+        values = NuclideIdArray(other)._ids
+        unique_ids = self.unique()._ids
+        if len(unique_ids) < 1:
+            return numpy.zeros(len(values), dtype=bool)
+        pos = numpy.searchsorted(unique_ids, values)
+        pos[pos == len(unique_ids)] = 0
+        return unique_ids[pos] == values
+
+    def index(self, other):
+        '''Return position in the unique sorted ids of each nuclide in
+           other, or -1 if not present'''
+        values = NuclideIdArray(other)._ids
+        unique_ids = self.unique()._ids
+        pos = numpy.searchsorted(unique_ids, values)
+        found = self.contains(values)
+        return numpy.where(found, pos, -1)
+
+    def unique(self):
+        '''Return the sorted, unique nuclides in this collection'''
+        if self._unique_ids is None:
+            self._unique_ids = numpy.unique(self._ids)
+        return NuclideIdArray(self._unique_ids)
+
+    def union(self, other):
+        '''Return sorted, unique nuclides in either collection'''
+        return NuclideIdArray(numpy.union1d(self._ids,
+                                            NuclideIdArray(other)._ids))
+
+    def intersection(self, other):
+        '''Return sorted, unique nuclides in both collections'''
+        return NuclideIdArray(numpy.intersect1d(self._ids,
+                                                NuclideIdArray(other)._ids))
+
+    def difference(self, other):
+        '''Return sorted, unique nuclides not in the other collection'''
+        return NuclideIdArray(numpy.setdiff1d(self._ids,
+                                              NuclideIdArray(other)._ids))
+
+def _as_id_int(nucl_id):
+    '''Return the Nuclide ID integer for a NuclideId or integer'''
+    if isinstance(nucl_id, NuclideId):
+        return nucl_id._id
+    return int(nucl_id)
+
+##########################################################################
+
 class ReactionId(object):
     '''Unique key for identifying a specific transition between nuclides'''
     def __init__(self, init_nucl_id=None, reac_type=None, final_nucl_id=None):
@@ -151,25 +351,12 @@ class ReactionId(object):
     @classmethod
     def _determine_final_nuclide(cls, init_nucl_id, reac_type):
         '''Determine the most natural final nuclide for this reaction'''
-        final_nucl_id = None
-        [Zin, Ain] = [init_nucl_id.Z,init_nucl_id.A]
-        if reac_type is ReactionType.AlphaDecay:
-            final_nucl_id = NuclideId(Z=Zin-2,A=Ain-4,M=0)
-        elif reac_type is ReactionType.BetaDecay:
-            final_nucl_id = NuclideId(Z=Zin+1,A=Ain,M=0)
-        elif reac_type is ReactionType.Beta+Decay:
-            final_nucl_id = NuclideId(Z=Zin-1,A=Ain,M=0)
-        elif reac_type is ReactionType.GammaDecay:
-            final_nucl_id = NuclideId(Z=Zin,A=Ain,M=0)
-        elif reac_type is ReactionType.NeutronCapture:
-            final_nucl_id = NuclideId(Z=Zin,A=Ain+1,M=0)
-        elif reac_type is ReactionType.p_n:
-            final_nucl_id = NuclideId(Z=Zin+1,A=Ain,M=0)
-        elif reac_type is ReactionType.n_p:
-            final_nucl_id = NuclideId(Z=Zin-1,A=Ain,M=0)
-        else:
+        if not reaction_offset_table.has_key(reac_type):
             raise ValueError('Cannot determine final nuclide: init=%r, final=%r'
-                             % (init_nucl_id, final_nucl_id))
+                             % (init_nucl_id, None))
+        (dZ, dA) = reaction_offset_table[reac_type]
+        final_nucl_id = NuclideId(Z=init_nucl_id.Z+dZ, A=init_nucl_id.A+dA,
+                                  M=0)
         return final_nucl_id
 
     def __hash__(self):
@@ -1,10 +1,20 @@
+import threading
 ##########################################################################
 
 class BaseModel(object):
-    '''Base class for all models'''
+    '''Base class for all models
+
+       Models with data files load them on first use: the first call to
+       known_ids() or process(), or an explicit load().  Loading happens
+       exactly once, even if several threads use the model at the same
+       time.  Specify lazy=False to load on construction instead.
+    '''
     def __init__(self, **kwargs):
         '''Constructor'''
         self._name = kwargs['name']
+        self._lazy = kwargs.get('lazy', True)
+        self._loaded = False
+        self._load_lock = threading.Lock()
         return
 
     @property
@@ -15,6 +25,45 @@ class BaseModel(object):
     def known_ids(self):
         '''Return list of IDs known to this model'''
         return []
+
+    def provides(self):
+        '''Return the keys which process() may set, or None if unknown.
+           Factories can then defer processing until one of the keys is
+           accessed (see DataContainer.set_lazy).'''
+        return None
+
+    def data_sources(self):
+        '''Return the data files this model parses through the data
+           cache, as a list of (parser, filenames, version) arguments of
+           load_cached().  These may be parsed ahead of time, in other
+           processes (see oklo.core.pipeline).'''
+        return []
+
+    def is_loaded(self):
+        '''Check if the data of this model has been loaded'''
+        return self._loaded
+
+    def load(self):
+        '''Load the data of this model, unless already loaded'''
+        if self._loaded:
+            return
+        with self._load_lock:
+            # Another thread may have loaded while this one waited
+            if not self._loaded:
+                self._load_data()
+                self._loaded = True
+        return
+
+    def _init_loading(self):
+        '''Load now, unless loading is deferred.  Call at the end of the
+           constructor of models with data.'''
+        if not self._lazy:
+            self.load()
+        return
+
+    def _load_data(self):
+        '''Load the data of this model.  Redefine in models with data.'''
+        return
     
 ##########################################################################    
 
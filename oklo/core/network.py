@@ -1,42 +1,171 @@
+from oklo.core.ids import ReactionId, NuclideIdArray
+from oklo.core.columns import ColumnTable
+from oklo.core.nuclide import NuclideView
+from oklo.core.reaction import ReactionView
+import numpy
 ##########################################################################
 
 class ReactionNetwork(object):
     '''Represent a reaction network as a set of nuclides and reactions
     between them.  (Essentially a 'graph data structure' in computer
     science lingo.)
+
+    In columnar mode, the information of each nuclide and reaction is
+    copied into typed columns on add() (see oklo.core.columns), and the
+    network holds light-weight NuclideView and ReactionView objects in
+    place of the added elements.  Views support the same dictionary
+    access, e.g. network.get(id)['mass_excess'].
     '''
-    def __init__(self, name='Unknown', elements=[]):
+    def __init__(self, name='Unknown', elements=[], columnar=False):
         '''Constructor'''
         self._name = name
-        self._elements = elements
+        self._nuclide_table = None
+        self._reaction_table = None
+        self._nuclide_rows = []
+        self._reaction_rows = []
+        if columnar:
+            self._nuclide_table = ColumnTable()
+            self._reaction_table = ColumnTable()
         self._nuclides = []
         self._reactions = []
+        self._nuclides_sorted = True
+        self._reactions_sorted = True
         self._reactions_from = {}
         self._reactions_to = {}
         self._id_map = {}
-        self._update_index()
+        self._graph = None
+        self._chart = None
+        self.add(elements)
         return
 
     @property
     def name(self):
         return self._name
 
+    def is_columnar(self):
+        '''Check if this network stores element information by column'''
+        return self._nuclide_table is not None
+
+    @property
+    def nuclide_table(self):
+        '''Return the ColumnTable of nuclide information, if columnar'''
+        return self._nuclide_table
+
+    @property
+    def reaction_table(self):
+        '''Return the ColumnTable of reaction information, if columnar'''
+        return self._reaction_table
+
     @property
     def nuclides(self):
+        if not self._nuclides_sorted:
+            self._nuclides.sort(key=lambda elem: elem.id)
+            self._nuclides_sorted = True
         return self._nuclides
 
     @property
     def reactions(self):
+        if not self._reactions_sorted:
+            self._reactions.sort(key=lambda elem: elem.id)
+            self._reactions_sorted = True
         return self._reactions
 
     def get(self, id):
         '''Retrieve nuclide or reaction by ID'''
         return self._id_map[id]
 
+    def has_id(self, id):
+        '''Check if a nuclide or reaction with this ID is in the network'''
+        return id in self._id_map
+
+    def __contains__(self, id):
+        '''Allow 'id in network' membership tests'''
+        return id in self._id_map
+
+    def __len__(self):
+        '''Return the number of nuclides and reactions in the network'''
+        return len(self._id_map)
+
     def known_ids(self):
         '''Retrieve list of known nuclide and reaction ids'''
         return self._id_map.keys()
+
+    def nuclide_ids(self):
+        '''Retrieve the ids of all nuclides, in sorted order, as an array'''
+        return NuclideIdArray([nuclide.id for nuclide in self.nuclides])
     
+    def nuclides_with(self, *keys):
+        '''Return the nuclides which have all of these keys, in id order'''
+        if self.is_columnar():
+            return self._select(self._nuclide_table, self._nuclide_rows, keys)
+        return [nuclide for nuclide in self.nuclides
+                if all([nuclide.has_key(key) for key in keys])]
+
+    def reactions_with(self, *keys):
+        '''Return the reactions which have all of these keys, in id order'''
+        if self.is_columnar():
+            return self._select(self._reaction_table, self._reaction_rows,
+                                keys)
+        return [reaction for reaction in self.reactions
+                if all([reaction.has_key(key) for key in keys])]
+
+    def nuclide_column(self, key):
+        '''Return (ids, values) of the nuclides which have this key, in id
+           order, as a NuclideIdArray and a numpy array'''
+        if self.is_columnar():
+            (values, present) = self._nuclide_table.column(key)
+            rows = numpy.flatnonzero(present & self._nuclide_table.live)
+            ids = NuclideIdArray([self._nuclide_table.ids[row]
+                                  for row in rows])
+            order = numpy.argsort(ids.ids, kind='mergesort')
+            return (ids[order], values[rows[order]])
+        nuclides = self.nuclides_with(key)
+        return (NuclideIdArray([nuclide.id for nuclide in nuclides]),
+                numpy.array([nuclide[key] for nuclide in nuclides]))
+
+    def nuclide_chart(self):
+        '''Return a NuclideChart of the masses and beta decays in this
+           network, e.g. for Q-values of all reactions at once.  The chart
+           is kept until elements are added or removed, or data_changed()
+           is called.'''
+        from oklo.core.chart import NuclideChart
+        if self._chart is None:
+            self._chart = NuclideChart.from_network(self)
+        return self._chart
+
+    def data_changed(self):
+        '''Discard results derived from element data (the nuclide chart).
+           Call after changing data of elements in the network.'''
+        self._chart = None
+        return
+
+    def q_values(self, reac_type):
+        '''Return (initial ids, final ids, Q-values, allowed mask) of a
+           reaction type from every nuclide in the network'''
+        nucl_ids = self.nuclide_ids()
+        (final_nucl_ids, q_values,
+         allowed) = self.nuclide_chart().q_values(reac_type, nucl_ids)
+        return (nucl_ids, final_nucl_ids, q_values, allowed)
+
+    def decay_matrix(self):
+        '''Return the sparse DecayMatrix of the beta decays in this
+           network, over its nuclides and the parents and daughters of the
+           decays (see oklo.utils.bateman)'''
+        from oklo.utils.bateman import DecayMatrix
+        decays = [reaction['beta_decay']
+                  for reaction in self.reactions_with('beta_decay')]
+        decay_nucl_ids = NuclideIdArray(
+            [decay.reaction_id.initial_nuclide_id for decay in decays]
+            + [decay.reaction_id.final_nuclide_id for decay in decays])
+        return DecayMatrix.from_decays(
+            decays, self.nuclide_ids().union(decay_nucl_ids))
+
+    def _select(self, table, views, keys):
+        '''Return the views of the rows which have all of these keys'''
+        return sorted([views[row] for row in
+                       numpy.flatnonzero(table.mask(*keys))],
+                      key=lambda elem: elem.id)
+
     def reactions_from(self, nucl_id):
         '''Return list of reactions leaving from this nuclide'''
         if not self._reactions_from.has_key(nucl_id):
@@ -51,56 +180,213 @@ class ReactionNetwork(object):
 
     def network_from(self, id):
         '''Return the sub-network extending from this nuclide or reaction'''
-        # FIXME: Implement this function
-        return None
+        return self._subnetwork(id, downstream=True)
 
     def network_to(self, id):
         '''Return the sub-network extending to this nuclide or reaction'''
-        # FIXME: Implement this function
-        return None
+        return self._subnetwork(id, downstream=False)
+
+    def _subnetwork(self, id, downstream):
+        '''Collect the elements reachable from a nuclide or reaction,
+           following reactions forward (downstream) or backward, and return
+           them as a new network sharing the same element objects.'''
+        if self._graph is None:
+            self._graph = _ReactionGraph(self.nuclides, self.reactions)
+        graph = self._graph
+        elements = []
+        if isinstance(id, ReactionId):
+            if id not in self._id_map:
+                raise ValueError('Reaction %s not in network.' % id)
+            elements.append(self._id_map[id])
+            if downstream:
+                nucl_id = id.final_nuclide_id
+            else:
+                nucl_id = id.initial_nuclide_id
+        else:
+            nucl_id = id
+        if nucl_id not in graph.node_index:
+            if len(elements) < 1:
+                raise ValueError('Nuclide %s not in network.' % nucl_id)
+            (nodes, edges) = ([], [])
+        else:
+            (nodes, edges) = graph.traverse(graph.node_index[nucl_id],
+                                            downstream)
+        for node in nodes:
+            node_id = graph.node_ids[node]
+            if node_id in self._id_map:
+                elements.append(self._id_map[node_id])
+        for edge in edges:
+            reaction = graph.reactions[edge]
+            if reaction.id != id:
+                elements.append(reaction)
+        direction = 'from'
+        if not downstream: direction = 'to'
+        return ReactionNetwork(name='%s_%s_%s' % (self._name, direction, id),
+                               elements=elements)
 
     def add(self, element_list):
         '''Add list of elements to this network'''
-        if len(element_list) < 1: return
         for element in element_list:
-            if element.id in self.known_ids():
+            if element.id in self._id_map:
                 print 'Warning: Attempting to re-add %s to network.' % (
                     element.id)
                 continue
-            self._elements.append(element)
-        self._update_index()
-    
-    def _update_index(self):
-        '''Update indices of reactions and nuclides'''
-        # Initialize indices
-        self._nuclides = []
-        self._reactions = []
-        self._reactions_from = {}
-        self._reactions_to = {}
-        self._id_map = {}
-        # Sort elements
-        self._elements = sorted(self._elements, key=lambda elem: elem.id)
-        # Add each element to indices
-        for element in self._elements:
             if element.is_nuclide():
-                self._nuclides.append(element)
+                if self.is_columnar():
+                    element = self._make_view(element, self._nuclide_table,
+                                              self._nuclide_rows, NuclideView)
+                self._add_nuclide(element)
             elif element.is_reaction():
-                self._reactions.append(element)
+                if self.is_columnar():
+                    element = self._make_view(element, self._reaction_table,
+                                              self._reaction_rows,
+                                              ReactionView)
+                self._add_reaction(element)
             else:
                 raise ValueError('Attempting to add invalid type "%s".' % (
                     element.__class__.__name__))
-        for nuclide in self._nuclides:
-            self._id_map[nuclide.id] = nuclide
-        for reaction in self._reactions:
-            self._id_map[reaction.id] = reaction
-            init_nucl_id = reaction.initial_nuclide_id
-            final_nucl_id = reaction.final_nuclide_id
-            if not self._reactions_from.has_key(init_nucl_id):
-                self._reactions_from[init_nucl_id] = []
-            if not self._reactions_to.has_key(final_nucl_id):
-                self._reactions_to[final_nucl_id] = []
-            self._reactions_from[init_nucl_id].append(reaction)
-            self._reactions_to[final_nucl_id].append(reaction)
+            self._graph = None
+            self._chart = None
+        return
+
+    def remove(self, id_list):
+        '''Remove the elements with these ids from this network'''
+        removed_ids = set()
+        for id in id_list:
+            if id not in self._id_map:
+                print 'Warning: Attempting to remove %s, not in network.' % (
+                    id)
+                continue
+            element = self._id_map.pop(id)
+            removed_ids.add(id)
+            if self.is_columnar():
+                if element.is_nuclide():
+                    self._nuclide_table.remove_row(element.row)
+                else:
+                    self._reaction_table.remove_row(element.row)
+            if element.is_reaction():
+                _remove_from_index(self._reactions_from,
+                                   element.initial_nuclide_id, element)
+                _remove_from_index(self._reactions_to,
+                                   element.final_nuclide_id, element)
+        if len(removed_ids) < 1: return
+        self._graph = None
+        self._chart = None
+        self._nuclides = [nuclide for nuclide in self._nuclides
+                          if nuclide.id not in removed_ids]
+        self._reactions = [reaction for reaction in self._reactions
+                           if reaction.id not in removed_ids]
+        return
+
+    def _make_view(self, element, table, views, view_class):
+        '''Copy element information into a new table row, and return a
+           view of the row'''
+        row = table.add_row(element.id)
+        for (key, value) in element.items():
+            table.set(row, key, value)
+        view = view_class(table, row, element.id)
+        views.append(view)
+        return view
+
+    def _add_nuclide(self, nuclide):
+        '''Add nuclide to indices'''
+        if self._nuclides_sorted and len(self._nuclides) > 0:
+            self._nuclides_sorted = self._nuclides[-1].id < nuclide.id
+        self._nuclides.append(nuclide)
+        self._id_map[nuclide.id] = nuclide
+        return
+
+    def _add_reaction(self, reaction):
+        '''Add reaction to indices'''
+        if self._reactions_sorted and len(self._reactions) > 0:
+            self._reactions_sorted = self._reactions[-1].id < reaction.id
+        self._reactions.append(reaction)
+        self._id_map[reaction.id] = reaction
+        _insert_sorted(self._reactions_from.setdefault(
+            reaction.initial_nuclide_id, []), reaction)
+        _insert_sorted(self._reactions_to.setdefault(
+            reaction.final_nuclide_id, []), reaction)
+        return
+
+##########################################################################
+
+def _insert_sorted(element_list, element):
+    '''Insert element into a short list kept sorted by element id'''
+    idx = len(element_list)
+    while idx > 0 and element.id < element_list[idx-1].id:
+        idx -= 1
+    element_list.insert(idx, element)
+    return
+
+def _remove_from_index(index, nucl_id, reaction):
+    '''Remove reaction from the index list for this nuclide'''
+    reaction_list = index[nucl_id]
+    for idx in range(len(reaction_list)):
+        if reaction_list[idx] is reaction:
+            del reaction_list[idx]
+            break
+    if len(reaction_list) < 1:
+        del index[nucl_id]
+    return
+
+##########################################################################
+
+class _ReactionGraph(object):
+    '''Integer-indexed adjacency of a reaction network, in compressed
+       sparse row (CSR) form for both reaction directions'''
+    def __init__(self, nuclides, reactions):
+        '''Constructor'''
+        self.reactions = list(reactions)
+        # Nodes: all nuclides in network or referenced by a reaction
+        self.node_ids = [nuclide.id for nuclide in nuclides]
+        self.node_index = dict([(nucl_id, idx) for (idx, nucl_id)
+                                in enumerate(self.node_ids)])
+        sources = numpy.zeros(len(self.reactions), dtype=int)
+        targets = numpy.zeros(len(self.reactions), dtype=int)
+        for (idx, reaction) in enumerate(self.reactions):
+            sources[idx] = self._node(reaction.initial_nuclide_id)
+            targets[idx] = self._node(reaction.final_nuclide_id)
+        n_nodes = len(self.node_ids)
+        self.forward = _make_csr(sources, targets, n_nodes)
+        self.backward = _make_csr(targets, sources, n_nodes)
         return
 
+    def _node(self, nucl_id):
+        '''Return index of nuclide, adding a new node if needed'''
+        if nucl_id not in self.node_index:
+            self.node_index[nucl_id] = len(self.node_ids)
+            self.node_ids.append(nucl_id)
+        return self.node_index[nucl_id]
+
+    def traverse(self, start, downstream):
+        '''Breadth-first search from node index start.  Returns arrays of
+           the visited node indices and traversed edge (reaction) indices.'''
+        (indptr, neighbors, edge_ids) = self.forward
+        if not downstream:
+            (indptr, neighbors, edge_ids) = self.backward
+        visited = numpy.zeros(len(self.node_ids), dtype=bool)
+        visited[start] = True
+        frontier = numpy.array([start], dtype=int)
+        edges = []
+        while len(frontier) > 0:
+            # Gather all CSR entries of the frontier nodes at once
+            starts = indptr[frontier]
+            counts = indptr[frontier+1] - starts
+            entries = (numpy.repeat(starts - numpy.cumsum(counts) + counts,
+                                    counts)
+                       + numpy.arange(counts.sum()))
+            edges.append(edge_ids[entries])
+            next_nodes = numpy.unique(neighbors[entries])
+            frontier = next_nodes[~visited[next_nodes]]
+            visited[frontier] = True
+        return (numpy.flatnonzero(visited), numpy.concatenate(edges))
+
 ##########################################################################
+
+def _make_csr(rows, columns, n_rows):
+    '''Build CSR arrays (indptr, columns, entry ids) from row/column pairs'''
+    order = numpy.argsort(rows, kind='mergesort')
+    indptr = numpy.zeros(n_rows+1, dtype=int)
+    indptr[1:] = numpy.cumsum(numpy.bincount(rows, minlength=n_rows))
+    return (indptr, columns[order], order)
+
@@ -1,13 +1,11 @@
 from oklo.core.data import DataContainer
+from oklo.core.columns import ColumnView
 ##########################################################################
 
-class Nuclide(DataContainer):
-    '''A single nuclide, with unique ID and associated information
-    '''
-    def __init__(self, nucl_id):
-        '''Constructor'''
-        DataContainer.__init__(self, nucl_id)
-        return
+class NuclideProperties(object):
+    '''Nuclide properties derived from the nuclide id, shared by Nuclide
+       and NuclideView'''
+    __slots__ = ()
 
     @property
     def name(self):
@@ -47,3 +45,19 @@ class Nuclide(DataContainer):
     def is_nuclide(self):
         '''Allow others to ask if this is a nuclide'''
         return True
+
+class Nuclide(NuclideProperties, DataContainer):
+    '''A single nuclide, with unique ID and associated information
+    '''
+    def __init__(self, nucl_id):
+        '''Constructor'''
+        DataContainer.__init__(self, nucl_id)
+        return
+
+class NuclideView(NuclideProperties, ColumnView):
+    '''A single nuclide, with information stored in a row of a columnar
+       ReactionNetwork (see oklo.core.columns)
+    '''
+    __slots__ = ()
+
+##########################################################################
@@ -0,0 +1,158 @@
+from oklo.utils.datacache import write_arrays
+import time
+##########################################################################
+
+class Pipeline(object):
+    '''Build a reaction network with several factories.
+
+       Model data is loaded concurrently: data files missing from the
+       on-disk data cache are first parsed into it by a pool of worker
+       processes, and the models then load from the cache in a pool of
+       threads.  The network is then extended and processed by each
+       factory in turn, as Factory.process(), ordered so that each
+       factory follows those it depends on (see Factory.depends_on), and
+       otherwise in the order given.  The resulting network is therefore
+       the same however loading is scheduled.
+    '''
+    def __init__(self, factories, threads=None, processes=None):
+        '''Constructor.  By default, one thread per model and one
+           process per CPU are used.'''
+        self._factories = list(factories)
+        self._threads = threads
+        self._processes = processes
+        self._order = _dependency_order(self._factories)
+        self._loaded = False
+        return
+
+    @property
+    def factories(self):
+        '''Return the factories, in processing order'''
+        return [self._factories[idx] for idx in self._order]
+
+    def models(self):
+        '''Return the distinct models used by all factories'''
+        models = []
+        for factory in self.factories:
+            for model in factory.models():
+                if model not in models:
+                    models.append(model)
+        return models
+
+    def load(self):
+        '''Load the data of all models.  Returns the time taken.'''
+        start_time = time.time()
+        models = [model for model in self.models() if not model.is_loaded()]
+        sources = []
+        for model in models:
+            for source in model.data_sources():
+                if source not in sources:
+                    sources.append(source)
+        self._parse_sources(sources)
+        self._load_models(models)
+        self._loaded = True
+        return time.time() - start_time
+
+    def process(self, network):
+        '''Load models if needed, then process the network with each
+           factory.  Returns a dictionary of statistics: the load time,
+           and the process() statistics of each factory by name.'''
+        stats = {'load_time':0., 'factories':{}}
+        if not self._loaded:
+            stats['load_time'] = self.load()
+        for factory in self.factories:
+            stats['factories'][factory.name] = factory.process(network)
+        return stats
+
+    def _parse_sources(self, sources):
+        '''Parse data files missing from the data cache into it, in
+           worker processes'''
+        import multiprocessing
+        from oklo.utils import datacache
+        processes = self._processes
+        if processes is None:
+            processes = multiprocessing.cpu_count()
+        if not datacache.cache_enabled or min(processes, len(sources)) <= 1:
+            # Models parse their own data on load
+            return
+        missing = _missing_sources(sources)
+        processes = min(processes, len(missing))
+        if processes <= 1:
+            return
+        pool = multiprocessing.Pool(processes=processes)
+        try:
+            pool.map(_parse_source, missing)
+        finally:
+            pool.close()
+            pool.join()
+        return
+
+    def _load_models(self, models):
+        '''Load each model, in a pool of threads'''
+        from multiprocessing.pool import ThreadPool
+        threads = self._threads
+        if threads is None:
+            threads = len(models)
+        threads = min(threads, len(models))
+        if threads <= 1:
+            for model in models:
+                model.load()
+            return
+        pool = ThreadPool(processes=threads)
+        try:
+            pool.map(_load_model, models)
+        finally:
+            pool.close()
+            pool.join()
+        return
+
+def _missing_sources(sources):
+    '''Return (parser, filenames, cache file) for each data source
+       which is not yet in the data cache'''
+    import os
+    from oklo.utils.datacache import cache_filename
+    missing = []
+    for (parser, filenames, version) in sources:
+        cache_file = cache_filename(parser, filenames, version)
+        if not os.path.exists(cache_file):
+            missing.append((parser, filenames, cache_file))
+    return missing
+
+def _parse_source(source):
+    '''Worker: parse one data source into the data cache'''
+    (parser, filenames, cache_file) = source
+    write_arrays(cache_file, parser(filenames))
+    return None
+
+def _load_model(model):
+    '''Worker: load the data of one model'''
+    model.load()
+    return None
+
+def _dependency_order(factories):
+    '''Return factory indices ordered so that each factory follows those
+       it depends on, and otherwise keeps its position'''
+    index_by_name = {}
+    for (idx, factory) in enumerate(factories):
+        if index_by_name.has_key(factory.name):
+            raise ValueError('Duplicate factory name "%s"' % factory.name)
+        index_by_name[factory.name] = idx
+    for factory in factories:
+        for name in factory.depends_on:
+            if not index_by_name.has_key(name):
+                raise ValueError('Factory "%s" depends on unknown factory '
+                                 '"%s"' % (factory.name, name))
+    order = []
+    done = set()
+    while len(order) < len(factories):
+        ready = [idx for (idx, factory) in enumerate(factories)
+                 if idx not in done
+                 and all([index_by_name[name] in done
+                          for name in factory.depends_on])]
+        if len(ready) < 1:
+            raise ValueError('Factory dependencies contain a cycle')
+        # Take the earliest ready factory, to keep the given order
+        order.append(ready[0])
+        done.add(ready[0])
+    return order
+
+##########################################################################
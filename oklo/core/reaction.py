@@ -1,12 +1,11 @@
 from oklo.core.data import DataContainer
+from oklo.core.columns import ColumnView
 ##########################################################################
 
-class Reaction(DataContainer):
-    '''A single reaction, with unique ID and associated information
-    '''
-    def __init__(self, reac_id=None):
-        DataContainer.__init__(self, reac_id)
-        return
+class ReactionProperties(object):
+    '''Reaction properties derived from the reaction id, shared by
+       Reaction and ReactionView'''
+    __slots__ = ()
 
     @property
     def initial_nuclide_id(self):
@@ -27,5 +26,18 @@ class Reaction(DataContainer):
         '''Allow others to ask if this is a reaction'''
         return True
 
+class Reaction(ReactionProperties, DataContainer):
+    '''A single reaction, with unique ID and associated information
+    '''
+    def __init__(self, reac_id=None):
+        DataContainer.__init__(self, reac_id)
+        return
+
+class ReactionView(ReactionProperties, ColumnView):
+    '''A single reaction, with information stored in a row of a columnar
+       ReactionNetwork (see oklo.core.columns)
+    '''
+    __slots__ = ()
+
     
 ##########################################################################
@@ -3,6 +3,7 @@
 # Load core components
 from oklo.core.factory import NuclideFactory, ReactionFactory
 from oklo.core.network import ReactionNetwork
+from oklo.core.pipeline import Pipeline
 from oklo.core.ids import NuclideId, ReactionId
 from oklo.core.defs import ReactionType
 from oklo.core.units import MeV, seconds
@@ -12,8 +13,12 @@ from oklo.models.masseval import MassEvaluation
 from oklo.models.fissionyield import FissionYieldENDF
 from oklo.models.betaspectrum import BetaSpectrumENDF
 
+# Load reactor spectrum tools
+from oklo.utils.reactorspectrum import ReactorSpectrumBasis
+from oklo.utils.energygrid import EnergyGrid
+
 # Load other tools
-from numpy import linspace, zeros, vectorize
+from numpy import linspace, vectorize
 from math import exp
 
 #########################################################################
@@ -56,8 +61,9 @@ factories = [mass_factory, fission_factory, decay_factory]
 antinu_network = ReactionNetwork('AntinuSpectrumNetwork')
 
 # Load data into reaction network
-for factory in factories:
-    factory.process(antinu_network)
+#  (Model data is loaded concurrently, then each factory is applied)
+pipeline = Pipeline(factories)
+pipeline.process(antinu_network)
 
 #########################################################################
 # Examples: Accessing Nuclide and Reaction data from the reaction network
@@ -65,6 +71,8 @@ for factory in factories:
 
 # Define energy range and resolution for spectral calculation
 energies = linspace(0*MeV, 15*MeV, 1501)
+# (Spectra are cached by EnergyGrid: convert once, and reuse the grid)
+energy_grid = EnergyGrid(energies)
 
 # Access data of one nuclide:
 Y_96_id = NuclideId('Y_96')
@@ -89,7 +97,7 @@ print '  reaction:',Y_96_beta_decay_id
 beta_decay_Y_96 = Y_96_beta_decay['beta_decay'] 
 print '  q_value[MeV]:',beta_decay_Y_96.q_value / MeV
 print '  half_life[s]:',beta_decay_Y_96.half_life / seconds
-antinuspec_Y_96 = beta_decay_Y_96.antineutrino_spectrum(energies)
+antinuspec_Y_96 = beta_decay_Y_96.antineutrino_spectrum(energy_grid)
 #print '  antinu_spec:',antinuspec_Y_96
 print ''
 
@@ -103,68 +111,23 @@ fission_fractions = {NuclideId('Uranium_235'):0.584,
                      NuclideId('Plutonium_239'):0.290,
                      NuclideId('Plutonium_241'):0.050}
 #
-#  Step 2: Prepare total spectrum and other useful values
-antinuspec_reactor = zeros(len(energies))
-fission_daughters_total = 0
-fission_daughters_included = 0
-decay_rate_total = 0
-decay_rate_included = 0
-missing_decays = []
+#  Step 2: Build the spectrum basis for these fission parents, once.
+#          (Sums the spectra of fission daughters above the interaction
+#           threshold, weighted by cumulative yield, for each parent)
+reactor_basis = ReactorSpectrumBasis(antinu_network, energy_grid,
+                                     sorted(fission_fractions.keys()),
+                                     threshold=1.8*MeV)
 #
-#  Step 3: Loop over known nuclides, summing antineutrino spectra
-for nuclide in antinu_network.nuclides:
-    # Skip nuclides which are not known fission daughters
-    if not nuclide.has_key('cumulative_yield'): continue
-    # Calculate decay rate for this nuclide in reactor, assuming equilibrium
-    decay_rate = 0
-    cumulative_yield = nuclide['cumulative_yield'] 
-    for fiss_parent in fission_fractions.keys():
-        # Skip fission parent if yield is not known
-        if not cumulative_yield.has_key(fiss_parent): continue
-        # Otherwise, use yield to estimate equilibrium decay rate
-        fiss_yield = cumulative_yield[fiss_parent]
-        decay_rate += fiss_yield*fission_fractions[fiss_parent]
-    # Skip nuclide if decay rate is zero
-    if decay_rate==0: continue
-    # Prepare Reaction ID for beta decay of this nuclide
-    beta_decay_id = ReactionId(init_nucl_id=nuclide.id,
-                               reac_type=ReactionType.BetaDecay)
-    # Check if beta decay above interaction threshold is allowed
-    # according to energy conservation
-    if beta_decay_id.final_nuclide_id in antinu_network.known_ids():
-        # Retrieve final nuclide
-        final_nuclide = antinu_network.get(beta_decay_id.final_nuclide_id)
-        # Check that mass is known for initial and final states
-        if (nuclide.has_key('mass_excess')
-            and final_nuclide.has_key('mass_excess')):
-            avail_energy = nuclide['mass_excess'] - final_nuclide['mass_excess']
-            # Skip if energy below antineutrino detection threshold
-            if avail_energy < 1.8 * MeV: continue
-    # Count the number of relevant fission daughters
-    fission_daughters_total += 1
-    # Count the total fission daughter equilibrium decay rate
-    decay_rate_total += decay_rate
-    # Check if daughter has known beta decay spectrum
-    if beta_decay_id not in antinu_network.known_ids():
-        # No reaction information for this possible decay
-        missing_decays.append( {'reac_id':beta_decay_id,
-                                'decay_rate':decay_rate} )
-        continue
-    beta_reaction = antinu_network.get(beta_decay_id)
-    if not beta_reaction.has_key('beta_decay'):
-        # No decay spectrum information for this decay
-        missing_decays.append( {'reac_id':beta_decay_id,
-                                'decay_rate':decay_rate} )
-        continue
-    beta_decay = beta_reaction['beta_decay']
-    # Add this decay to total reactor spectrum
-    antinuspec_reactor += (decay_rate
-                           * beta_decay.antineutrino_spectrum(energies))
-    # Keep track of the fraction of decays with known spectrum
-    fission_daughters_included += 1
-    decay_rate_included += decay_rate
-missing_decays = sorted(missing_decays, key=lambda elem: elem['decay_rate'],
-                        reverse=True)
+#  Step 3: Evaluate total spectrum and other useful values
+#          (Each new set of fission fractions only needs Step 3)
+antinuspec_reactor = reactor_basis.spectrum(fission_fractions)
+decay_rates = reactor_basis.decay_rates(fission_fractions)
+has_decay = decay_rates != 0
+fission_daughters_total = has_decay.sum()
+fission_daughters_included = (has_decay & reactor_basis.has_spectrum).sum()
+decay_rate_total = float(decay_rates.sum())
+decay_rate_included = float(decay_rates[reactor_basis.has_spectrum].sum())
+missing_decays = reactor_basis.missing_decays(fission_fractions)
 #
 # Step 4: Print calculation results
 print ''
@@ -1,7 +1,9 @@
 from oklo.core.ids import NuclideId, ReactionId
 from oklo.core.defs import ReactionType
 from oklo.core.model import ReactionModel
-from oklo.utils.parsers import parse_decays_ENDF
+from oklo.utils.parsers import (parse_decays_ENDF_arrays,
+                                decays_ENDF_arrays_version)
+from oklo.utils.datacache import load_cached
 from oklo.utils.betadecay import BetaDecaySpectrum, BetaDecayBranch
 ##########################################################################
 
@@ -12,15 +14,41 @@ class BetaSpectrumENDF(ReactionModel):
         # Parse configuration and load data
         ReactionModel.__init__(self, **kwargs)
         self._decays_by_id = {}
-        self._load_decays(kwargs['decay_data'])
+        self._use_cache = kwargs.get('use_cache', True)
+        self._decay_data = kwargs['decay_data']
+        self._init_loading()
+        return
+
+    def provides(self):
+        '''Return the keys set by process()'''
+        return ['beta_decay']
+
+    def data_sources(self):
+        '''Return the data files parsed through the data cache'''
+        if not self._use_cache:
+            return []
+        return [(parse_decays_ENDF_arrays, self._decay_data,
+                 decays_ENDF_arrays_version)]
+
+    def _load_data(self):
+        '''Parse the beta decay data'''
+        self._load_decays(self._decay_data)
         return
 
     def known_ids(self):
         '''Return the IDs of reactions known to this model'''
+        self.load()
         return self._decays_by_id.keys()
+
+    def decays(self):
+        '''Return the BetaDecaySpectrum of each known reaction'''
+        self.load()
+        return [self._decays_by_id[reac_id]
+                for reac_id in sorted(self._decays_by_id.keys())]
     
     def process(self, reaction):
         '''Add beta decay information to this reaction'''
+        self.load()
         if not self._decays_by_id.has_key(reaction.id):
             print '  No decay information for reaction %s' % reaction.id
             return
@@ -30,27 +58,40 @@ class BetaSpectrumENDF(ReactionModel):
     def _load_decays(self,decay_data):
         '''Process the configuration for this model'''
         # Parse decay data
-        decay_infos = parse_decays_ENDF(decay_data)
+        decay_table = load_cached(parse_decays_ENDF_arrays, decay_data,
+                                  decays_ENDF_arrays_version,
+                                  self._use_cache)
+        branch_columns = [decay_table['branch_'+key].tolist()
+                          for key in ('e0', 'sigma_e0', 'fraction',
+                                      'sigma_fraction')]
+        branch_infos = zip(*branch_columns)
         # Reformat as a table by reaction id
         decays_by_id = {}
-        for decay_info in decay_infos:
+        first_branch = 0
+        for (Z, A, M, half_life, q_value, n_branches) in zip(
+                decay_table['Z'].tolist(),
+                decay_table['A'].tolist(),
+                decay_table['M'].tolist(),
+                decay_table['half_life'].tolist(),
+                decay_table['e0_max'].tolist(),
+                decay_table['n_branches'].tolist()):
             # Step 1: Construct reaction ID
-            reac_id = ReactionId(init_nucl_id=NuclideId(Z=decay_info['Z'],
-                                                        A=decay_info['A'],
-                                                        M=decay_info['M']),
+            reac_id = ReactionId(init_nucl_id=NuclideId(Z=Z, A=A, M=M),
                                  reac_type=ReactionType.BetaDecay)
             # Step 2: Create beta spectrum calculator for each branch
             branches = []
-            for branch_info in decay_info['branch_infos']:
+            for (e0, sigma_e0, fraction, sigma_fraction) in branch_infos[
+                    first_branch:first_branch+n_branches]:
                 branch = BetaDecayBranch(reaction_id=reac_id,
-                                         e0=branch_info['e0'],
-                                         sigma_e0=branch_info['sigma_e0'],
-                                         fraction=branch_info['fraction'],
-                                         sigma_fraction=branch_info['sigma_fraction'])
+                                         e0=e0,
+                                         sigma_e0=sigma_e0,
+                                         fraction=fraction,
+                                         sigma_fraction=sigma_fraction)
                 branches.append(branch)
+            first_branch += n_branches
             decay = BetaDecaySpectrum(reaction_id=reac_id,
-                                      q_value=decay_info['E0max'],
-                                      half_life=decay_info['half_life'],
+                                      q_value=q_value,
+                                      half_life=half_life,
                                       branches=branches)
             # Step 3: Append to list of decays
             decays_by_id[reac_id] = decay
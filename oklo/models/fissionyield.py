@@ -1,5 +1,8 @@
+from oklo.core.ids import NuclideId
 from oklo.core.model import NuclideModel
-from oklo.utils.parsers import parse_yields_ENDFB
+from oklo.utils.parsers import (parse_yields_ENDFB_arrays,
+                                yields_ENDFB_arrays_version)
+from oklo.utils.datacache import load_cached
 ##########################################################################
 
 class FissionYieldENDF(NuclideModel):
@@ -9,15 +12,35 @@ class FissionYieldENDF(NuclideModel):
         # Parse configuration and load data
         NuclideModel.__init__(self, **kwargs)
         self._yields_by_id = {}
-        self._load_yields(kwargs['yield_data'])
+        self._use_cache = kwargs.get('use_cache', True)
+        self._yield_data = kwargs['yield_data']
+        self._init_loading()
+        return
+
+    def provides(self):
+        '''Return the keys set by process()'''
+        return ['cumulative_yield']
+
+    def data_sources(self):
+        '''Return the data files parsed through the data cache'''
+        if not self._use_cache:
+            return []
+        return [(parse_yields_ENDFB_arrays, self._yield_data,
+                 yields_ENDFB_arrays_version)]
+
+    def _load_data(self):
+        '''Parse the fission yield data'''
+        self._load_yields(self._yield_data)
         return
 
     def known_ids(self):
         '''Return the IDs of reactions known to this model'''
+        self.load()
         return self._yields_by_id.keys()
     
     def process(self, nuclide):
         '''Add cumulative fission yields to this nuclide'''
+        self.load()
         if not self._yields_by_id.has_key(nuclide.id):
             #print '  No known yield for nuclide %s' % nuclide.id
             return
@@ -27,22 +50,19 @@ class FissionYieldENDF(NuclideModel):
     def _load_yields(self,yield_data):
         '''Process the configuration for this model'''
         # Parse fission yield data
-        yields_by_parent = parse_yields_ENDFB(yield_data)
+        yield_table = load_cached(parse_yields_ENDFB_arrays, yield_data,
+                                  yields_ENDFB_arrays_version,
+                                  self._use_cache)
         # Reformat as a table for each fission daughter
-        #  Step 1: Determine list of yielded daughter nuclides
-        fiss_daughters = set()
-        for yields in yields_by_parent.values():
-            daughter_ids = yields.keys()
-            fiss_daughters.update( set(daughter_ids) )
-        #  Step 2: Prepare yield table for each daughter nuclide
         yields_by_id = {}
-        for daught_id in fiss_daughters:
-            daughter_yields = {}
-            for (parent_id, yields) in yields_by_parent.iteritems():
-                if yields.has_key(daught_id):
-                    fiss_yield = yields[daught_id]['cumulative']
-                    daughter_yields[parent_id] = fiss_yield
-            yields_by_id[daught_id] = daughter_yields
+        for (parent, daughter, fiss_yield) in zip(
+                yield_table['parent'].tolist(),
+                yield_table['daughter'].tolist(),
+                yield_table['cumulative'].tolist()):
+            daught_id = NuclideId(id=daughter)
+            if not yields_by_id.has_key(daught_id):
+                yields_by_id[daught_id] = {}
+            yields_by_id[daught_id][NuclideId(id=parent)] = fiss_yield
         # Save reformatted yield table
         self._yields_by_id = yields_by_id
         return
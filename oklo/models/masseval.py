@@ -1,6 +1,9 @@
-from oklo.core.ids import NuclideId
+from oklo.core.ids import NuclideId, NuclideIdArray
 from oklo.core.model import NuclideModel
-from oklo.utils.parsers import parse_isomers_table
+from oklo.utils.parsers import (parse_isomers_table, parse_mass_eval_arrays,
+                                mass_eval_arrays_version)
+from oklo.utils.datacache import load_cached
+import numpy
 ####################################################################
 
 class MassEvaluation(NuclideModel):
@@ -10,17 +13,38 @@ class MassEvaluation(NuclideModel):
         NuclideModel.__init__(self, **kwargs)
         # parse standard mass evaluation table
         self._mass_excess_by_id = {} 
-        self._parse_table(kwargs['mass_data'])
-        self._load_isomers(kwargs['isomer_data'])
+        self._mass_table = None
+        self._use_cache = kwargs.get('use_cache', True)
+        self._mass_data = kwargs['mass_data']
+        self._isomer_data = kwargs['isomer_data']
+        self._init_loading()
+        return
+
+    def provides(self):
+        '''Return the keys set by process()'''
+        return ['mass_excess']
+
+    def data_sources(self):
+        '''Return the data files parsed through the data cache'''
+        if not self._use_cache:
+            return []
+        return [(parse_mass_eval_arrays, [self._mass_data],
+                 mass_eval_arrays_version)]
+
+    def _load_data(self):
+        '''Parse the mass evaluation and isomer data'''
+        self._parse_table(self._mass_data)
+        self._load_isomers(self._isomer_data)
         return
 
     def _parse_table(self, mass_data):
         '''Parse the mass evaluation data file'''
-        from oklo.utils.parsers import parse_mass_eval_table
-        nuclides_data = parse_mass_eval_table(mass_data)
-        for nuclide_data in nuclides_data:
-            nucl_id=nuclide_data['id']
-            self._mass_excess_by_id[nucl_id] = nuclide_data['mass_excess']
+        mass_table = load_cached(parse_mass_eval_arrays, [mass_data],
+                                 mass_eval_arrays_version, self._use_cache)
+        self._mass_table = mass_table
+        for (nucl_id, mass_excess) in zip(mass_table['id'].tolist(),
+                                          mass_table['mass_excess'].tolist()):
+            self._mass_excess_by_id[NuclideId(id=nucl_id)] = mass_excess
         return
 
     def _load_isomers(self, isomer_pkg):
@@ -37,6 +61,7 @@ class MassEvaluation(NuclideModel):
     
     def process(self, nuclide):
         '''Add mass information to this nuclide'''
+        self.load()
         if not self._mass_excess_by_id.has_key(nuclide.id):
             print '  No mass data for nuclide %s' % nuclide.id
             return
@@ -45,7 +70,22 @@ class MassEvaluation(NuclideModel):
 
     def known_ids(self):
         '''Return the list of ids of nuclides known by this model'''
+        self.load()
         return sorted(self._mass_excess_by_id.keys())
+
+    def evaluation_table(self):
+        '''Return all columns of the mass evaluation, as a dictionary of
+           arrays (see oklo.utils.parsers.mass_eval_dtype).  Isomers are
+           not included.'''
+        self.load()
+        return self._mass_table
+
+    def mass_excess_table(self):
+        '''Return (NuclideIdArray, mass excess array) of known nuclides'''
+        nucl_ids = self.known_ids()
+        return (NuclideIdArray(nucl_ids),
+                numpy.array([self._mass_excess_by_id[nucl_id]
+                             for nucl_id in nucl_ids], dtype=float))
     
 ####################################################################
 
@@ -0,0 +1,21 @@
+from oklo.core.ids import NuclideId, ReactionId
+from oklo.core.defs import ReactionType
+from oklo.core.units import MeV
+from oklo.utils.betadecay import BetaDecayBranch, BetaDecaySpectrum
+##########################################################################
+# Shared fixtures for the tests
+
+def make_decay(name, e0s, fractions=None, half_life=1.0):
+    '''Return the BetaDecaySpectrum of nuclide name, with one branch for
+       each endpoint energy in e0s (in MeV).  Branch fractions default
+       to equal shares.'''
+    reac_id = ReactionId(NuclideId(name), ReactionType.BetaDecay)
+    if fractions is None:
+        fractions = [1.0/len(e0s)] * len(e0s)
+    branches = [BetaDecayBranch(reaction_id=reac_id, e0=e0*MeV, sigma_e0=0,
+                                fraction=fraction, sigma_fraction=0)
+                for (e0, fraction) in zip(e0s, fractions)]
+    return BetaDecaySpectrum(reaction_id=reac_id, q_value=max(e0s)*MeV,
+                             half_life=half_life, branches=branches)
+
+##########################################################################
@@ -0,0 +1,107 @@
+import unittest
+
+from numpy import array, exp, log, allclose, linspace
+
+from oklo.core.ids import NuclideId, ReactionId, NuclideIdArray
+from oklo.core.defs import ReactionType
+from oklo.core.nuclide import Nuclide
+from oklo.core.reaction import Reaction
+from oklo.core.network import ReactionNetwork
+from oklo.utils.bateman import DecayMatrix, BatemanSolver
+from oklo.tests.helpers import make_decay
+
+class TestBatemanSolver(unittest.TestCase):
+
+    def setUp(self):
+        # Rb-96 -> Sr-96 -> Y-96 -> Zr-96 (stable)
+        self.half_lives = [0.2, 1.07, 5.34]
+        decays = [make_decay(name, [1.0], half_life=half_life)
+                  for (name, half_life)
+                  in zip(['Rubidium_96', 'Strontium_96', 'Yttrium_96'],
+                         self.half_lives)]
+        self.matrix = DecayMatrix.from_decays(decays)
+        self.solver = BatemanSolver(self.matrix)
+
+    def tearDown(self):
+        del self.matrix
+        del self.solver
+
+    def bateman(self, t):
+        '''Analytic chain solution from unit initial parent'''
+        lam = log(2) / array(self.half_lives)
+        amounts = []
+        for n in range(len(lam)):
+            total = 0
+            for i in range(n + 1):
+                denom = 1.
+                for j in range(n + 1):
+                    if j != i: denom *= lam[j] - lam[i]
+                total = total + exp(-lam[i]*t) / denom
+            amounts.append(lam[:n].prod() * total)
+        amounts.append(1 - sum(amounts))
+        return array(amounts)
+
+    def test_matrix(self):
+        self.assertEqual(list(self.matrix.nuclide_ids.name),
+                         ['Rubidium_96', 'Strontium_96', 'Yttrium_96',
+                          'Zirconium_96'])
+        dense = self.matrix.todense()
+        self.assertTrue(allclose(dense.sum(axis=0), 0))
+        inventory = array([1., 2., 3., 4.])
+        self.assertTrue(allclose(self.matrix.dot(inventory),
+                                 dense.dot(inventory)))
+
+    def test_chain(self):
+        times = array([0, 0.1, 1, 10, 100, 1e4])
+        initial = self.matrix.inventory({NuclideId('Rubidium_96'):1.0})
+        inventories = self.solver.solve(initial, times)
+        self.assertEqual(inventories.shape, (len(times), 4))
+        for (t, inventory) in zip(times, inventories):
+            self.assertTrue(allclose(inventory, self.bateman(t),
+                                     rtol=1e-10, atol=1e-12))
+
+    def test_batch(self):
+        times = linspace(0, 20, 5)
+        initial = array([[1., 0, 0, 0], [0, 1., 0, 0], [0.5, 0, 0.5, 0]])
+        inventories = self.solver.solve(initial, times)
+        self.assertEqual(inventories.shape, (5, 3, 4))
+        for (idx, row) in enumerate(initial):
+            self.assertTrue(allclose(self.solver.solve(row, times),
+                                     inventories[:, idx]))
+        self.assertTrue(allclose(inventories.sum(axis=-1), 1))
+
+    def test_branch_fractions(self):
+        # Only 40% of the Sr-96 decays are beta decays to Y-96
+        decays = [make_decay('Strontium_96', [1.0], [0.4], half_life=1.07),
+                  make_decay('Yttrium_96', [1.0], [1.2], half_life=5.34)]
+        matrix = DecayMatrix.from_decays(decays)
+        lam = log(2) / array([1.07, 5.34])
+        self.assertTrue(allclose(matrix.decay_constants, list(lam) + [0]))
+        dense = matrix.todense()
+        self.assertAlmostEqual(dense[1, 0], 0.4*lam[0])
+        self.assertAlmostEqual(dense[2, 1], lam[1])
+        self.assertTrue(allclose(dense.sum(axis=0), [-0.6*lam[0], 0, 0]))
+        initial = matrix.inventory({NuclideId('Strontium_96'):1.0})
+        final = BatemanSolver(matrix).solve(initial, [1e4])[0]
+        self.assertTrue(allclose(final, [0, 0, 0.4], atol=1e-12))
+
+    def test_cycle(self):
+        matrix = DecayMatrix(NuclideIdArray.from_names(['Yttrium_96',
+                                                        'Zirconium_96']),
+                             [0, 1], [1, 0], [1., 1.])
+        self.assertRaises(ValueError, BatemanSolver, matrix)
+
+    def test_network(self):
+        elements = [Nuclide(NuclideId('Yttrium_96'))]
+        reaction = Reaction(ReactionId(NuclideId('Yttrium_96'),
+                                       ReactionType.BetaDecay))
+        reaction['beta_decay'] = make_decay('Yttrium_96', [1.0], half_life=5.34)
+        elements.append(reaction)
+        matrix = ReactionNetwork('TestNetwork', elements).decay_matrix()
+        self.assertEqual(list(matrix.nuclide_ids.name),
+                         ['Yttrium_96', 'Zirconium_96'])
+        self.assertTrue(allclose(matrix.decay_constants,
+                                 [log(2)/5.34, 0]))
+
+if '__main__'==__name__:
+    unittest.main()
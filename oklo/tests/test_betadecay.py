@@ -0,0 +1,242 @@
+import unittest
+
+from numpy import linspace, array, allclose, trapz, concatenate
+
+from oklo.core.ids import NuclideId, ReactionId
+from oklo.core.defs import ReactionType
+from oklo.core.units import MeV
+from oklo.utils.betadecay import (BetaDecayBranch, BetaDecaySpectrum,
+                                  BetaBranchTable, FermiTable, ARRAY_RTOL,
+                                  fermiG_Huber, fermiG_Huber_array,
+                                  fermiG_Vogel, fermiG_Vogel_array,
+                                  dNdE_beta_arrays)
+
+decay_types = [None, 'AllowedGT', 'NUForbGT_0m', 'NUForbGT_1m',
+               'UForbGT_2m', 'NUForbF_1m']
+
+class TestBetaDecayArray(unittest.TestCase):
+
+    def setUp(self):
+        reac_id = ReactionId(NuclideId('Yttrium_96'), ReactionType.BetaDecay)
+        self.fixture = dict([(decay_type,
+                              BetaDecayBranch(reaction_id=reac_id,
+                                              e0=7.1*MeV, sigma_e0=0,
+                                              fraction=1.0, sigma_fraction=0,
+                                              decay_type=decay_type))
+                             for decay_type in decay_types])
+        self.energies = linspace(0*MeV, 10*MeV, 1001)
+
+    def tearDown(self):
+        del self.fixture
+
+    def test_fermi_huber(self):
+        scalar = array([fermiG_Huber(40, 96, Te) for Te in self.energies])
+        self.assertTrue(allclose(fermiG_Huber_array(40, 96, self.energies),
+                                 scalar, rtol=ARRAY_RTOL, atol=0))
+
+    def test_fermi_vogel(self):
+        scalar = array([fermiG_Vogel(40, Te) for Te in self.energies])
+        self.assertTrue(allclose(fermiG_Vogel_array(40, self.energies),
+                                 scalar, rtol=ARRAY_RTOL, atol=0))
+
+    def test_neutrino_array(self):
+        for branch in self.fixture.values():
+            scalar = array([branch.dNdE_neutrino(Tnu)
+                            for Tnu in self.energies])
+            self.assertTrue(allclose(branch.dNdE_neutrino_array(self.energies),
+                                     scalar, rtol=ARRAY_RTOL, atol=0))
+
+    def test_electron_array(self):
+        for branch in self.fixture.values():
+            scalar = array([branch.dNdE_electron(Te)
+                            for Te in self.energies])
+            self.assertTrue(allclose(branch.dNdE_electron_array(self.energies),
+                                     scalar, rtol=ARRAY_RTOL, atol=0))
+
+    def test_normalization(self):
+        energies = linspace(0*MeV, 7.1*MeV, 200001)
+        for branch in self.fixture.values():
+            spectrum = branch.antineutrino_spectrum(energies)
+            self.assertTrue(allclose(trapz(spectrum, energies), 1,
+                                     rtol=1e-6, atol=0))
+
+    def test_partial_grid(self):
+        branch = self.fixture['NUForbGT_1m']
+        full = branch.antineutrino_spectrum(self.energies)
+        partial = concatenate((self.energies[180:400:7],
+                               self.energies[400:800:50]))
+        expected = concatenate((full[180:400:7], full[400:800:50]))
+        self.assertTrue(allclose(branch.antineutrino_spectrum(partial),
+                                 expected, rtol=ARRAY_RTOL, atol=0))
+
+    def test_beta_arrays(self):
+        for (decay_type, branch) in self.fixture.items():
+            (electron, antinu) = dNdE_beta_arrays(self.energies, 7.1*MeV,
+                                                  40, 96, decay_type)
+            self.assertTrue(allclose(electron,
+                                     branch.dNdE_electron_array(self.energies),
+                                     rtol=ARRAY_RTOL, atol=0))
+            self.assertTrue(allclose(antinu,
+                                     branch.dNdE_neutrino_array(self.energies),
+                                     rtol=ARRAY_RTOL, atol=0))
+
+    def test_electron_spectrum(self):
+        energies = linspace(0*MeV, 7.1*MeV, 200001)
+        for branch in self.fixture.values():
+            spectrum = branch.electron_spectrum(energies)
+            self.assertTrue(allclose(trapz(spectrum, energies), 1,
+                                     rtol=1e-6, atol=0))
+            self.assertTrue(branch.electron_spectrum(energies) is spectrum)
+
+    def test_binned_spectrum(self):
+        energies = linspace(0*MeV, 8*MeV, 400001)
+        edge_idx = [0, 25000, 100000, 165000, 340000, 350000]
+        bin_edges = energies[edge_idx]
+        for branch in self.fixture.values():
+            spectrum = branch.antineutrino_spectrum(energies)
+            expected = [trapz(spectrum[low:high+1], energies[low:high+1])
+                        for (low, high) in zip(edge_idx[:-1], edge_idx[1:])]
+            binned = branch.binned_spectrum(bin_edges)
+            self.assertTrue(allclose(binned, expected, rtol=0, atol=1e-8))
+            self.assertTrue(allclose(branch.binned_spectrum([-1, 20]), 1,
+                                     rtol=1e-12, atol=0))
+
+class TestBetaBranchTable(unittest.TestCase):
+
+    def setUp(self):
+        decays = []
+        for (name, e0s) in [('Yttrium_96', [7.1, 3.0]),
+                            ('Strontium_96', []),
+                            ('Rubidium_96', [11.5, 8.2, 5.0])]:
+            reac_id = ReactionId(NuclideId(name), ReactionType.BetaDecay)
+            branches = [BetaDecayBranch(reaction_id=reac_id, e0=e0*MeV,
+                                        sigma_e0=0, fraction=0.1*(idx+1),
+                                        sigma_fraction=0,
+                                        decay_type=decay_types[idx])
+                        for (idx, e0) in enumerate(e0s)]
+            decays.append(BetaDecaySpectrum(reaction_id=reac_id,
+                                            q_value=max(e0s+[0])*MeV,
+                                            half_life=1.0,
+                                            branches=branches))
+        self.fixture = decays
+        self.energies = linspace(0*MeV, 12*MeV, 1201)
+
+    def tearDown(self):
+        del self.fixture
+
+    def test_branch_spectra(self):
+        table = BetaBranchTable.from_decays(self.fixture)
+        spectra = table.antineutrino_spectra(self.energies)
+        branches = sum([decay.branches() for decay in self.fixture], [])
+        self.assertEqual(spectra.shape, (len(branches), len(self.energies)))
+        for (branch, spectrum) in zip(branches, spectra):
+            self.assertTrue(allclose(
+                branch.antineutrino_spectrum(self.energies), spectrum,
+                rtol=ARRAY_RTOL, atol=0))
+
+    def test_decay_spectra(self):
+        table = BetaBranchTable.from_decays(self.fixture)
+        spectra = table.decay_antineutrino_spectra(self.energies)
+        self.assertEqual(spectra.shape, (3, len(self.energies)))
+        self.assertEqual(spectra[1].sum(), 0)
+        for (decay, spectrum) in zip(self.fixture, spectra):
+            expected = sum([branch.fraction
+                            * branch.antineutrino_spectrum(self.energies)
+                            for branch in decay.branches()])
+            self.assertTrue(allclose(expected, spectrum,
+                                     rtol=ARRAY_RTOL, atol=0))
+
+    def test_split(self):
+        table = BetaBranchTable.from_decays(self.fixture)
+        expected = table.decay_antineutrino_spectra(self.energies)
+        for n_shards in [1, 2, 3, 10]:
+            shards = table.split(n_shards)
+            self.assertTrue(len(shards) <= n_shards)
+            self.assertEqual(sum([shard.reaction_ids for shard in shards],
+                                 []), range(table.n_decays()))
+            for shard in shards:
+                self.assertTrue(allclose(
+                    shard.decay_antineutrino_spectra(self.energies),
+                    expected[shard.reaction_ids], rtol=ARRAY_RTOL, atol=0))
+
+    def test_decay_binned_spectrum(self):
+        bin_edges = linspace(0*MeV, 12*MeV, 25)
+        for decay in self.fixture:
+            expected = sum([branch.fraction
+                            * branch.binned_spectrum(bin_edges)
+                            for branch in decay.branches()])
+            self.assertTrue(allclose(decay.binned_spectrum(bin_edges),
+                                     expected, rtol=ARRAY_RTOL, atol=0))
+
+    def test_beta_spectra(self):
+        table = BetaBranchTable.from_decays(self.fixture)
+        (electron, antinu) = table.decay_beta_spectra(self.energies)
+        self.assertTrue(allclose(
+            antinu, table.decay_antineutrino_spectra(self.energies),
+            rtol=ARRAY_RTOL, atol=0))
+        for (decay, spectrum) in zip(self.fixture, electron):
+            self.assertTrue(allclose(decay.electron_spectrum(self.energies),
+                                     spectrum, rtol=ARRAY_RTOL, atol=0))
+            expected = sum([branch.fraction
+                            * branch.electron_spectrum(self.energies)
+                            for branch in decay.branches()])
+            self.assertTrue(allclose(expected, spectrum,
+                                     rtol=ARRAY_RTOL, atol=0))
+
+    def test_norms(self):
+        table = BetaBranchTable.from_decays(self.fixture)
+        branches = sum([decay.branches() for decay in self.fixture], [])
+        self.assertTrue(allclose(table.antineutrino_norms(),
+                                 [branch.antineutrino_norm()
+                                  for branch in branches],
+                                 rtol=ARRAY_RTOL, atol=0))
+        # Norms are calculated once per table
+        self.assertTrue(table.antineutrino_norms() is
+                        table.antineutrino_norms())
+
+    def test_decay_branch_table(self):
+        decay = self.fixture[2]
+        table = decay.branch_table()
+        self.assertTrue(decay.branch_table() is table)
+        self.assertEqual(table.reaction_ids, [decay.reaction_id])
+        spectrum = decay.antineutrino_spectrum(self.energies)
+        self.assertTrue(allclose(spectrum,
+                                 table.decay_antineutrino_spectra(
+                                     self.energies)[0],
+                                 rtol=ARRAY_RTOL, atol=0))
+
+    def test_fermi_table_spectra(self):
+        table = BetaBranchTable.from_decays(self.fixture)
+        expected = table.antineutrino_spectra(self.energies)
+        spectra = table.antineutrino_spectra(self.energies, FermiTable())
+        self.assertTrue(allclose(spectra, expected, rtol=1e-4, atol=0))
+
+class TestFermiTable(unittest.TestCase):
+
+    def test_huber(self):
+        fermi_table = FermiTable('Huber', Te_max=10*MeV)
+        energies = linspace(0*MeV, 12*MeV, 1777)
+        Z = array([[40], [92]])
+        A = array([[96], [235]])
+        expected = fermiG_Huber_array(Z, A, energies)
+        self.assertTrue(allclose(fermi_table(Z, A, energies), expected,
+                                 rtol=1e-4, atol=0))
+        self.assertEqual(fermi_table.n_tables(), 2)
+        # Exact at the table energies
+        self.assertTrue(allclose(fermi_table(40, 96, fermi_table.energies),
+                                 fermiG_Huber_array(40, 96,
+                                                    fermi_table.energies),
+                                 rtol=ARRAY_RTOL, atol=0))
+
+    def test_vogel(self):
+        fermi_table = FermiTable('Vogel')
+        energies = linspace(0*MeV, 10*MeV, 1777)
+        self.assertTrue(allclose(fermi_table(40, 96, energies),
+                                 fermiG_Vogel_array(40, energies),
+                                 rtol=1e-4, atol=0))
+
+    def test_unknown_method(self):
+        self.assertRaises(ValueError, FermiTable, 'Fermi')
+
+if '__main__'==__name__:
+    unittest.main()
@@ -0,0 +1,118 @@
+import unittest
+
+from numpy import isnan, allclose
+
+from oklo.core.ids import NuclideId, ReactionId, NuclideIdArray
+from oklo.core.defs import ReactionType
+from oklo.core.nuclide import Nuclide
+from oklo.core.reaction import Reaction
+from oklo.core.network import ReactionNetwork
+from oklo.core.units import MeV
+from oklo.core.chart import NuclideChart, final_nuclide_ids
+from oklo.utils.betadecay import BetaDecayBranch, BetaDecaySpectrum
+
+class TestNuclideChart(unittest.TestCase):
+
+    def setUp(self):
+        elements = []
+        for (name, mass_excess) in [('Yttrium_96', -65.2*MeV),
+                                    ('Zirconium_96', -85.4*MeV),
+                                    ('Yttrium_96_m1', -64.1*MeV)]:
+            nuclide = Nuclide(NuclideId(name))
+            nuclide['mass_excess'] = mass_excess
+            elements.append(nuclide)
+        reaction = Reaction(ReactionId(NuclideId('Yttrium_96'),
+                                       ReactionType.BetaDecay))
+        branch = BetaDecayBranch(reaction_id=reaction.id, e0=7.1*MeV,
+                                 sigma_e0=0, fraction=1, sigma_fraction=0)
+        reaction['beta_decay'] = BetaDecaySpectrum(
+            reaction_id=reaction.id, q_value=7.1*MeV, half_life=5.3,
+            branches=[branch])
+        elements.append(reaction)
+        self.fixture = NuclideChart.from_network(
+            ReactionNetwork('TestNetwork', elements))
+
+    def tearDown(self):
+        del self.fixture
+
+    def test_shape(self):
+        self.assertEqual(self.fixture.shape, (41, 58, 2))
+
+    def test_get(self):
+        nucl_ids = NuclideIdArray.from_names(['Yttrium_96', 'Yttrium_96_m1',
+                                              'Strontium_96', 'Uranium_235'])
+        mass_excess = self.fixture.get('mass_excess', nucl_ids)
+        self.assertTrue(allclose(mass_excess[:2], [-65.2*MeV, -64.1*MeV]))
+        self.assertTrue(isnan(mass_excess[2:]).all())
+        self.assertEqual(list(self.fixture.has(nucl_ids)),
+                         [True, True, False, False])
+
+    def test_decays(self):
+        nucl_ids = NuclideIdArray.from_names(['Yttrium_96', 'Zirconium_96'])
+        half_life = self.fixture.get('half_life', nucl_ids)
+        self.assertEqual(half_life[0], 5.3)
+        self.assertTrue(isnan(half_life[1]))
+        self.assertEqual(self.fixture.get('q_value', nucl_ids)[0], 7.1*MeV)
+
+    def test_neighbours(self):
+        nucl_ids = NuclideIdArray.from_names(['Yttrium_96', 'Yttrium_96_m1'])
+        final_ids = final_nuclide_ids(nucl_ids, ReactionType.BetaDecay)
+        self.assertEqual(list(final_ids.name), ['Zirconium_96'] * 2)
+        self.assertTrue(allclose(self.fixture.get('mass_excess', final_ids),
+                                 -85.4*MeV))
+
+    def test_nuclide_ids(self):
+        self.assertEqual(list(self.fixture.nuclide_ids().name),
+                         ['Yttrium_96', 'Yttrium_96_m1', 'Zirconium_96'])
+
+    def test_q_values(self):
+        nucl_ids = NuclideIdArray.from_names(['Yttrium_96', 'Yttrium_96_m1',
+                                              'Zirconium_96'])
+        (final_ids, q_values, allowed) = self.fixture.q_values(
+            ReactionType.BetaDecay, nucl_ids)
+        self.assertTrue(allclose(q_values[:2], [20.2*MeV, 21.3*MeV]))
+        self.assertTrue(isnan(q_values[2]))
+        self.assertEqual(list(allowed), [True, True, False])
+        (final_ids, q_values, allowed) = self.fixture.q_values(
+            ReactionType.GammaDecay, nucl_ids)
+        self.assertTrue(allclose(q_values[:2], [0, 1.1*MeV]))
+        self.assertEqual(list(allowed), [False, True, False])
+
+    def test_q_value_matrix(self):
+        reac_types = [ReactionType.BetaDecay, ReactionType.GammaDecay,
+                      ReactionType.NeutronCapture]
+        nucl_ids = self.fixture.nuclide_ids()
+        (q_values, allowed) = self.fixture.q_value_matrix(reac_types,
+                                                          nucl_ids)
+        self.assertEqual(q_values.shape, (3, 3))
+        for (reac_type, type_q_values) in zip(reac_types, q_values):
+            expected = self.fixture.q_values(reac_type, nucl_ids)[1]
+            self.assertTrue(allclose(type_q_values, expected,
+                                     equal_nan=True))
+
+    def test_candidate_reactions(self):
+        reac_ids = self.fixture.candidate_reactions(threshold=1.8*MeV)
+        self.assertEqual([str(reac_id) for reac_id in reac_ids],
+                         ['Yttrium_96_BetaDecay_to_Zirconium_96',
+                          'Yttrium_96_m1_BetaDecay_to_Zirconium_96',
+                          'Yttrium_96_p_n_to_Zirconium_96',
+                          'Yttrium_96_m1_p_n_to_Zirconium_96'])
+        reac_ids = self.fixture.candidate_reactions(
+            [ReactionType.GammaDecay])
+        self.assertEqual([str(reac_id) for reac_id in reac_ids],
+                         ['Yttrium_96_m1_GammaDecay_to_Yttrium_96'])
+
+class TestFinalNuclideIds(unittest.TestCase):
+
+    def test_matches_reaction_id(self):
+        nucl_ids = NuclideIdArray.from_names(['Yttrium_96', 'Uranium_235'])
+        for reac_type in [ReactionType.BetaDecay, ReactionType.AlphaDecay,
+                          ReactionType.NeutronCapture,
+                          ReactionType.BetaNeutronDecay]:
+            final_ids = final_nuclide_ids(nucl_ids, reac_type)
+            for (nucl_id, final_id) in zip(nucl_ids, final_ids):
+                self.assertEqual(ReactionId(nucl_id, reac_type)
+                                 .final_nuclide_id, final_id)
+
+if '__main__'==__name__:
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+
+from oklo.core.columns import ColumnTable
+
+class TestColumnTable(unittest.TestCase):
+
+    def setUp(self):
+        self.fixture = ColumnTable()
+        for idx in range(40):
+            row = self.fixture.add_row(idx)
+            if idx % 2:
+                self.fixture.set(row, 'half_life', 1.5*idx)
+            if idx % 3 == 0:
+                self.fixture.set(row, 'spin', idx)
+
+    def tearDown(self):
+        del self.fixture
+
+    def test_typed_columns(self):
+        (values, present) = self.fixture.column('half_life')
+        self.assertEqual(values.dtype, float)
+        self.assertEqual(present.sum(), 20)
+        self.assertEqual(self.fixture.get(3, 'half_life'), 4.5)
+        self.assertEqual(self.fixture.column('spin')[0].dtype.kind, 'i')
+        self.assertRaises(KeyError, self.fixture.get, 2, 'half_life')
+
+    def test_promote(self):
+        self.fixture.set(3, 'spin', 0.5)
+        self.assertEqual(self.fixture.column('spin')[0].dtype, float)
+        self.assertEqual(self.fixture.get(6, 'spin'), 6)
+        self.fixture.set(9, 'spin', 'unknown')
+        self.assertEqual(self.fixture.get(9, 'spin'), 'unknown')
+        self.assertEqual(self.fixture.get(6, 'spin'), 6)
+
+    def test_mask(self):
+        mask = self.fixture.mask('half_life', 'spin')
+        self.assertEqual(mask.nonzero()[0].tolist(), [3, 9, 15, 21, 27, 33, 39])
+        self.fixture.remove_row(9)
+        self.assertFalse(self.fixture.mask('half_life', 'spin')[9])
+        self.assertEqual(self.fixture.keys(9), [])
+
+if '__main__'==__name__:
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+import os
+import shutil
+import tempfile
+
+from numpy import array
+from numpy.testing import assert_array_equal
+
+from oklo.utils import datacache
+from oklo.utils.parsers import (parse_mass_eval_arrays,
+                                mass_eval_arrays_version)
+
+class TestDataCache(unittest.TestCase):
+
+    def setUp(self):
+        self._saved_cache_dir = datacache.cache_dir
+        datacache.cache_dir = tempfile.mkdtemp()
+        self.n_parsed = 0
+
+    def tearDown(self):
+        shutil.rmtree(datacache.cache_dir)
+        datacache.cache_dir = self._saved_cache_dir
+
+    def parse_mass_eval_arrays(self, filenames):
+        self.n_parsed += 1
+        return parse_mass_eval_arrays(filenames)
+
+    def test_cache(self):
+        parsed = parse_mass_eval_arrays(['data/mass.mas12'])
+        for idx in range(2):
+            cached = datacache.load_cached(self.parse_mass_eval_arrays,
+                                           ['data/mass.mas12'],
+                                           mass_eval_arrays_version)
+            self.assertEqual(sorted(cached.keys()), sorted(parsed.keys()))
+            for key in parsed.keys():
+                # NaN marks values which are not calculable
+                assert_array_equal(cached[key], parsed[key])
+        self.assertEqual(self.n_parsed, 1)
+
+    def test_truncated(self):
+        parsed = datacache.load_cached(self.parse_mass_eval_arrays,
+                                       ['data/mass.mas12'],
+                                       mass_eval_arrays_version)
+        cache_file = datacache.cache_filename(self.parse_mass_eval_arrays,
+                                              ['data/mass.mas12'],
+                                              mass_eval_arrays_version)
+        with open(cache_file, 'rb') as cached:
+            contents = cached.read()
+        with open(cache_file, 'wb') as cached:
+            cached.write(contents[:len(contents)//2])
+        for idx in range(2):
+            reparsed = datacache.load_cached(self.parse_mass_eval_arrays,
+                                             ['data/mass.mas12'],
+                                             mass_eval_arrays_version)
+            for key in parsed.keys():
+                assert_array_equal(reparsed[key], parsed[key])
+        # Parsed again once, and the cache file replaced
+        self.assertEqual(self.n_parsed, 2)
+
+    def test_failed_write(self):
+        # Renaming onto a directory fails
+        cache_file = os.path.join(datacache.cache_dir, 'directory.npz')
+        os.mkdir(cache_file)
+        datacache.write_arrays(cache_file, {'values':array([1., 2.])})
+        self.assertEqual(os.listdir(datacache.cache_dir), ['directory.npz'])
+
+    def test_version(self):
+        for version in [1, 2, 2]:
+            datacache.load_cached(self.parse_mass_eval_arrays,
+                                  ['data/mass.mas12'], version)
+        self.assertEqual(self.n_parsed, 2)
+
+    def test_disabled(self):
+        for idx in range(2):
+            datacache.load_cached(self.parse_mass_eval_arrays,
+                                  ['data/mass.mas12'],
+                                  mass_eval_arrays_version, use_cache=False)
+        self.assertEqual(self.n_parsed, 2)
+
+if '__main__'==__name__:
+    unittest.main()
@@ -0,0 +1,96 @@
+import unittest
+
+from numpy import linspace, allclose, array
+
+from oklo.core.ids import NuclideId, ReactionId
+from oklo.core.defs import ReactionType
+from oklo.core.units import MeV
+from oklo.utils.betadecay import BetaDecayBranch
+from oklo.utils.energygrid import (EnergyGrid, SpectrumCache, CacheBudget,
+                                  as_energy_grid)
+
+class TestEnergyGrid(unittest.TestCase):
+
+    def test_identity(self):
+        grid = EnergyGrid(linspace(0, 10, 101))
+        self.assertEqual(grid, EnergyGrid(linspace(0, 10, 101)))
+        self.assertEqual(hash(grid), hash(EnergyGrid(linspace(0, 10, 101))))
+        self.assertNotEqual(grid, EnergyGrid(linspace(0, 10, 102)))
+
+    def test_immutable(self):
+        energies = linspace(0, 10, 11)
+        grid = EnergyGrid(energies)
+        energies[0] = 5
+        self.assertEqual(grid[0], 0)
+        self.assertRaises(ValueError, grid.energies.__setitem__, 0, 5)
+
+    def test_as_energy_grid(self):
+        energies = linspace(0, 1, 11)
+        grid = as_energy_grid(energies)
+        self.assertTrue(as_energy_grid(grid) is grid)
+        self.assertTrue(as_energy_grid(energies) is grid)
+        # Arrays modified in place get a new grid
+        energies[-1] = 2
+        self.assertEqual(as_energy_grid(energies)[-1], 2)
+        self.assertEqual(grid[-1], 1)
+
+    def test_spacing(self):
+        self.assertTrue(allclose(EnergyGrid.linspace(0, 10, 11).step, 1))
+        grid = EnergyGrid([0, 1, 3])
+        self.assertFalse(grid.is_uniform())
+        self.assertTrue(allclose(grid.spacing, [1, 2]))
+        self.assertTrue(allclose(grid.weights, [0.5, 1.5, 1]))
+        self.assertTrue(allclose(grid.integrate(array([1., 1., 1.])), 3))
+
+class TestSpectrumCache(unittest.TestCase):
+
+    def test_lru(self):
+        cache = SpectrumCache(max_entries=2)
+        grids = [EnergyGrid.linspace(0, 1, n) for n in (10, 20, 30)]
+        cache.put(grids[0], grids[0].energies)
+        cache.put(grids[1], grids[1].energies)
+        cache.get(grids[0])
+        cache.put(grids[2], grids[2].energies)
+        self.assertTrue(cache.get(grids[1]) is None)
+        self.assertTrue(cache.get(grids[0]) is not None)
+        self.assertEqual(len(cache), 2)
+
+    def test_bytes(self):
+        cache = SpectrumCache(max_entries=10, max_bytes=50*8)
+        grids = [EnergyGrid.linspace(0, 1, n) for n in (20, 21, 30)]
+        for grid in grids:
+            cache.put(grid, grid.energies)
+        self.assertTrue(cache.nbytes <= 50*8)
+        self.assertTrue(cache.get(grids[0]) is None)
+
+    def test_shared_budget(self):
+        budget = CacheBudget(max_bytes=50*8)
+        caches = [SpectrumCache(budget=budget) for idx in range(2)]
+        grids = [EnergyGrid.linspace(0, 1, n) for n in (20, 21, 22)]
+        caches[0].put(grids[0], grids[0].energies)
+        caches[1].put(grids[1], grids[1].energies)
+        caches[0].get(grids[0])
+        # The least recently used entry of any cache is evicted
+        caches[0].put(grids[2], grids[2].energies)
+        self.assertTrue(budget.nbytes <= 50*8)
+        self.assertTrue(caches[1].get(grids[1]) is None)
+        self.assertTrue(caches[0].get(grids[0]) is not None)
+        self.assertEqual(caches[0].nbytes + caches[1].nbytes, budget.nbytes)
+        # Caches return their share when released
+        del caches[0]
+        self.assertEqual(budget.nbytes, 0)
+
+    def test_alternating_grids(self):
+        reac_id = ReactionId(NuclideId('Yttrium_96'), ReactionType.BetaDecay)
+        branch = BetaDecayBranch(reaction_id=reac_id, e0=7.1*MeV,
+                                 sigma_e0=0, fraction=1, sigma_fraction=0)
+        coarse = EnergyGrid.linspace(0*MeV, 10*MeV, 101)
+        fine = linspace(0*MeV, 10*MeV, 1001)
+        spectrum = branch.antineutrino_spectrum(coarse)
+        branch.antineutrino_spectrum(fine)
+        self.assertTrue(branch.antineutrino_spectrum(coarse) is spectrum)
+        self.assertTrue(branch.antineutrino_spectrum(coarse.energies.copy())
+                        is spectrum)
+
+if __name__ == '__main__':
+    unittest.main()
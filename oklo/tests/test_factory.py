@@ -0,0 +1,79 @@
+import unittest
+
+from oklo.core.ids import NuclideId
+from oklo.core.model import NuclideModel
+from oklo.core.factory import NuclideFactory
+from oklo.core.network import ReactionNetwork
+from oklo.core.nuclide import Nuclide
+
+class CountingModel(NuclideModel):
+    '''Nuclide model for testing, which counts processed nuclides'''
+    def __init__(self, **kwargs):
+        NuclideModel.__init__(self, **kwargs)
+        self._ids = [NuclideId(name) for name in kwargs['names']]
+        self.processed = 0
+
+    def known_ids(self):
+        return self._ids
+
+    def process(self, nuclide):
+        nuclide['model'] = self.name
+        self.processed += 1
+
+class TestFactory(unittest.TestCase):
+
+    def setUp(self):
+        self.default_model = CountingModel(
+            name='Default', names=['Yttrium_96', 'Strontium_96',
+                                   'Rubidium_96'])
+        self.scoped_model = CountingModel(name='Scoped', names=[])
+        self.fixture = NuclideFactory(
+            name='TestFactory',
+            model_list=[{'model':self.default_model, 'scope':'default'},
+                        {'model':self.scoped_model,
+                         'scope':['Zirconium_96']}])
+
+    def tearDown(self):
+        del self.fixture
+
+    def test_process(self):
+        network = ReactionNetwork('TestNetwork',
+                                  [Nuclide(NuclideId('Yttrium_96'))])
+        stats = self.fixture.process(network)
+        self.assertEqual(stats['added'], 3)
+        self.assertEqual(stats['processed'], 4)
+        self.assertTrue(stats['extend_time'] >= 0)
+        ids = [nuclide.id for nuclide in network.nuclides]
+        self.assertEqual(ids, sorted(ids))
+        self.assertEqual(network.get(NuclideId('Zirconium_96'))['model'],
+                         'Scoped')
+        self.assertEqual(self.default_model.processed, 3)
+
+    def test_no_extend(self):
+        self.fixture = NuclideFactory(
+            name='TestFactory', extend_network=False,
+            model_list=[{'model':self.default_model, 'scope':'default'}])
+        network = ReactionNetwork('TestNetwork',
+                                  [Nuclide(NuclideId('Yttrium_96'))])
+        stats = self.fixture.process(network)
+        self.assertEqual(stats['added'], 0)
+        self.assertEqual(len(network), 1)
+
+    def test_lazy(self):
+        self.fixture = NuclideFactory(
+            name='TestFactory', lazy=True,
+            model_list=[{'model':self.default_model, 'scope':'default'}])
+        self.default_model.provides = lambda: ['model']
+        network = ReactionNetwork('TestNetwork')
+        stats = self.fixture.process(network)
+        self.assertEqual(stats['deferred'], 3)
+        self.assertEqual(stats['processed'], 0)
+        self.assertEqual(self.default_model.processed, 0)
+        self.assertEqual(network.get(NuclideId('Yttrium_96'))['model'],
+                         'Default')
+        self.assertEqual(self.default_model.processed, 1)
+        self.assertEqual(len(network.nuclides_with('model')), 3)
+        self.assertEqual(self.default_model.processed, 3)
+
+if '__main__'==__name__:
+    unittest.main()
@@ -1,6 +1,8 @@
 import unittest
 
-from oklo.core.ids import NuclideId, ReactionId
+from numpy import all as all_true
+
+from oklo.core.ids import NuclideId, ReactionId, NuclideIdArray
 from oklo.core.defs import ReactionType
 
 class TestNuclideId(unittest.TestCase):
@@ -47,6 +49,16 @@ class TestNuclideId(unittest.TestCase):
     def test_nuclide_str(self):
         self.assertEqual(str(self.fixture),'Yttrium_96')
 
+    def test_nuclide_interned(self):
+        self.assertTrue(self.fixture is NuclideId('Yttrium_96'))
+        self.assertTrue(self.fixture is NuclideId(id=390960))
+        self.assertFalse(hasattr(self.fixture, '__dict__'))
+
+    def test_nuclide_pickle(self):
+        import pickle
+        self.assertTrue(pickle.loads(pickle.dumps(self.fixture))
+                        is self.fixture)
+
 class TestReactionId(unittest.TestCase):
 
     def setUp(self):
@@ -68,6 +80,14 @@ class TestReactionId(unittest.TestCase):
         self.assertEqual(self.fixture['reac1'].initial_nuclide_id,
                          self.fixture['reac2'].final_nuclide_id)
         
+    def test_reac_final_types(self):
+        nucl_id = NuclideId('Yttrium_96')
+        self.assertEqual(ReactionId(nucl_id, getattr(ReactionType,
+                                                     'Beta+Decay'))
+                         .final_nuclide_id, NuclideId('Strontium_96'))
+        self.assertEqual(ReactionId(nucl_id, ReactionType.BetaNeutronDecay)
+                         .final_nuclide_id, NuclideId('Zirconium_95'))
+
     def test_reac_str(self):
         self.assertEqual(str(self.fixture['reac1']),
                          'Yttrium_96_BetaDecay_to_Zirconium_96')
@@ -85,6 +105,58 @@ class TestReactionId(unittest.TestCase):
     def test_reac_compare3(self):
         self.assertTrue(self.fixture['reac1'] > self.fixture['reac2'])
         
+class TestNuclideIdArray(unittest.TestCase):
+
+    def setUp(self):
+        self.fixture = NuclideIdArray.from_names(['Yttrium_96', 'Strontium_96',
+                                                  'Yttrium_96_m1'])
+
+    def tearDown(self):
+        del self.fixture
+
+    def test_zam(self):
+        self.assertTrue(all_true(self.fixture.Z == [39, 38, 39]))
+        self.assertTrue(all_true(self.fixture.A == [96, 96, 96]))
+        self.assertTrue(all_true(self.fixture.M == [0, 0, 1]))
+        self.assertTrue(all_true(self.fixture.N == [57, 58, 57]))
+        self.assertTrue(all_true(
+            NuclideIdArray.from_zam([39, 38, 39], 96, [0, 0, 1]).ids
+            == self.fixture.ids))
+
+    def test_names(self):
+        self.assertEqual(list(self.fixture.name),
+                         ['Yttrium_96', 'Strontium_96', 'Yttrium_96_m1'])
+        self.assertEqual(list(self.fixture.endf_name),
+                         ['0390960', '0380960', '0390961'])
+        self.assertTrue(all_true(
+            NuclideIdArray.from_endf(self.fixture.endf_name).ids
+            == self.fixture.ids))
+
+    def test_items(self):
+        self.assertTrue(self.fixture[0] is NuclideId('Yttrium_96'))
+        self.assertEqual(list(self.fixture),
+                         [NuclideId('Yttrium_96'), NuclideId('Strontium_96'),
+                          NuclideId('Yttrium_96_m1')])
+        self.assertEqual(len(self.fixture[1:]), 2)
+
+    def test_membership(self):
+        self.assertTrue(NuclideId('Strontium_96') in self.fixture)
+        self.assertFalse(NuclideId('Strontium_97') in self.fixture)
+        self.assertEqual(list(self.fixture.contains(
+            [NuclideId('Strontium_97'), NuclideId('Yttrium_96_m1')])),
+                         [False, True])
+
+    def test_set_operations(self):
+        other = NuclideIdArray([NuclideId('Yttrium_96'),
+                                NuclideId('Zirconium_96')])
+        self.assertEqual(list(self.fixture.union(other).name),
+                         ['Strontium_96', 'Yttrium_96', 'Yttrium_96_m1',
+                          'Zirconium_96'])
+        self.assertEqual(list(self.fixture.intersection(other).name),
+                         ['Yttrium_96'])
+        self.assertEqual(list(self.fixture.difference(other).name),
+                         ['Strontium_96', 'Yttrium_96_m1'])
+
 if '__main__'==__name__:
     unittest.main()
 
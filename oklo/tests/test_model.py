@@ -0,0 +1,57 @@
+import unittest
+import threading
+import time
+
+from oklo.core.ids import NuclideId
+from oklo.core.model import NuclideModel
+from oklo.core.factory import NuclideFactory
+
+class SlowModel(NuclideModel):
+    '''Nuclide model for testing, with slow data loading'''
+    def __init__(self, **kwargs):
+        NuclideModel.__init__(self, **kwargs)
+        self._ids = []
+        self.loads = 0
+        self._init_loading()
+
+    def _load_data(self):
+        time.sleep(0.05)
+        self._ids = [NuclideId('Yttrium_96')]
+        self.loads += 1
+
+    def known_ids(self):
+        self.load()
+        return self._ids
+
+class TestLazyLoading(unittest.TestCase):
+
+    def test_deferred(self):
+        model = SlowModel(name='Slow')
+        self.assertFalse(model.is_loaded())
+        factory = NuclideFactory(name='SlowFactory',
+                                 model_list=[{'model':model,
+                                              'scope':'default'}])
+        self.assertEqual(model.loads, 0)
+        self.assertEqual(factory.known_ids(), set([NuclideId('Yttrium_96')]))
+        self.assertEqual(model.loads, 1)
+
+    def test_eager(self):
+        model = SlowModel(name='Slow', lazy=False)
+        self.assertTrue(model.is_loaded())
+        self.assertEqual(model.loads, 1)
+
+    def test_threads(self):
+        model = SlowModel(name='Slow')
+        results = []
+        threads = [threading.Thread(
+            target=lambda: results.append(len(model.known_ids())))
+                   for idx in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(model.loads, 1)
+        self.assertEqual(results, [1]*8)
+
+if '__main__'==__name__:
+    unittest.main()
@@ -0,0 +1,154 @@
+import unittest
+
+from oklo.core.ids import NuclideId, ReactionId
+from oklo.core.defs import ReactionType
+from oklo.core.nuclide import Nuclide
+from oklo.core.reaction import Reaction
+from oklo.core.network import ReactionNetwork
+
+class TestReactionNetwork(unittest.TestCase):
+
+    def setUp(self):
+        names = ['Rubidium_96', 'Strontium_96', 'Yttrium_96', 'Zirconium_96']
+        nuclides = [Nuclide(NuclideId(name)) for name in reversed(names)]
+        reactions = [Reaction(ReactionId(NuclideId(name),
+                                         ReactionType.BetaDecay))
+                     for name in names[:-1]]
+        self.fixture = ReactionNetwork('TestNetwork', nuclides[:2])
+        self.fixture.add(reactions + nuclides[2:])
+
+    def tearDown(self):
+        del self.fixture
+
+    def test_sorted(self):
+        ids = [nuclide.id for nuclide in self.fixture.nuclides]
+        self.assertEqual(ids, sorted(ids))
+        ids = [reaction.id for reaction in self.fixture.reactions]
+        self.assertEqual(ids, sorted(ids))
+
+    def test_contains(self):
+        self.assertEqual(len(self.fixture), 7)
+        self.assertTrue(NuclideId('Yttrium_96') in self.fixture)
+        self.assertTrue(self.fixture.has_id(
+            ReactionId(NuclideId('Yttrium_96'), ReactionType.BetaDecay)))
+        self.assertFalse(NuclideId('Yttrium_97') in self.fixture)
+
+    def test_readd(self):
+        self.fixture.add([Nuclide(NuclideId('Yttrium_96'))])
+        self.assertEqual(len(self.fixture.nuclides), 4)
+
+    def test_reactions_from_to(self):
+        Y_96_id = NuclideId('Yttrium_96')
+        self.assertEqual(len(self.fixture.reactions_from(Y_96_id)), 1)
+        self.assertEqual(self.fixture.reactions_to(Y_96_id)[0].id,
+                         ReactionId(NuclideId('Strontium_96'),
+                                    ReactionType.BetaDecay))
+        self.assertEqual(self.fixture.reactions_from(NuclideId('Zirconium_96')),
+                         None)
+
+    def test_remove(self):
+        Sr_96_decay_id = ReactionId(NuclideId('Strontium_96'),
+                                    ReactionType.BetaDecay)
+        self.fixture.remove([Sr_96_decay_id, NuclideId('Strontium_96')])
+        self.assertEqual(len(self.fixture), 5)
+        self.assertFalse(Sr_96_decay_id in self.fixture)
+        self.assertEqual(len(self.fixture.nuclides), 3)
+        self.assertEqual(self.fixture.reactions_to(NuclideId('Yttrium_96')),
+                         None)
+
+    def test_network_from(self):
+        subnetwork = self.fixture.network_from(NuclideId('Strontium_96'))
+        self.assertEqual([str(nuclide.id) for nuclide in subnetwork.nuclides],
+                         ['Strontium_96', 'Yttrium_96', 'Zirconium_96'])
+        self.assertEqual(len(subnetwork.reactions), 2)
+        # Sub-network shares element objects with the full network
+        self.assertTrue(subnetwork.get(NuclideId('Yttrium_96'))
+                        is self.fixture.get(NuclideId('Yttrium_96')))
+
+    def test_network_to(self):
+        Sr_96_decay_id = ReactionId(NuclideId('Strontium_96'),
+                                    ReactionType.BetaDecay)
+        subnetwork = self.fixture.network_to(Sr_96_decay_id)
+        self.assertEqual([str(nuclide.id) for nuclide in subnetwork.nuclides],
+                         ['Rubidium_96', 'Strontium_96'])
+        self.assertEqual(len(subnetwork.reactions), 2)
+        self.assertTrue(Sr_96_decay_id in subnetwork)
+
+    def test_network_unknown(self):
+        self.assertRaises(ValueError, self.fixture.network_from,
+                          NuclideId('Yttrium_97'))
+
+    def test_q_values(self):
+        for (name, mass_excess) in [('Strontium_96', -72.9), ('Yttrium_96',
+                                                              -78.3)]:
+            self.fixture.get(NuclideId(name))['mass_excess'] = mass_excess
+        (nucl_ids, final_ids, q_values,
+         allowed) = self.fixture.q_values(ReactionType.BetaDecay)
+        self.assertEqual(list(nucl_ids.name), ['Rubidium_96', 'Strontium_96',
+                                               'Yttrium_96', 'Zirconium_96'])
+        self.assertAlmostEqual(q_values[1], 5.4)
+        self.assertEqual(list(allowed), [False, True, False, False])
+
+    def test_nuclide_chart(self):
+        chart = self.fixture.nuclide_chart()
+        self.assertTrue(self.fixture.nuclide_chart() is chart)
+        self.fixture.data_changed()
+        self.assertTrue(self.fixture.nuclide_chart() is not chart)
+        chart = self.fixture.nuclide_chart()
+        self.fixture.remove([NuclideId('Zirconium_96')])
+        self.assertTrue(self.fixture.nuclide_chart() is not chart)
+
+class TestColumnarNetwork(unittest.TestCase):
+
+    def setUp(self):
+        nuclides = []
+        for (name, mass_excess) in [('Strontium_96', -72.9),
+                                    ('Rubidium_96', -61.2),
+                                    ('Yttrium_96', -65.5),
+                                    ('Zirconium_96', None)]:
+            nuclide = Nuclide(NuclideId(name))
+            if mass_excess is not None:
+                nuclide['mass_excess'] = mass_excess
+            nuclides.append(nuclide)
+        nuclides[0]['cumulative_yield'] = {NuclideId('Uranium_235'):0.06}
+        reaction = Reaction(ReactionId(NuclideId('Yttrium_96'),
+                                       ReactionType.BetaDecay))
+        self.fixture = ReactionNetwork('TestNetwork', nuclides + [reaction],
+                                       columnar=True)
+
+    def tearDown(self):
+        del self.fixture
+
+    def test_view(self):
+        Y_96 = self.fixture.get(NuclideId('Yttrium_96'))
+        self.assertTrue(Y_96.is_nuclide())
+        self.assertEqual(Y_96.Z, 39)
+        self.assertEqual(Y_96['mass_excess'], -65.5)
+        self.assertEqual(Y_96.keys(), ['mass_excess'])
+        self.assertFalse(Y_96.has_key('cumulative_yield'))
+        Y_96['cumulative_yield'] = {NuclideId('Uranium_235'):0.05}
+        self.assertEqual(self.fixture.get(NuclideId('Yttrium_96'))
+                         ['cumulative_yield'][NuclideId('Uranium_235')], 0.05)
+        reaction = self.fixture.reactions_from(NuclideId('Yttrium_96'))[0]
+        self.assertTrue(reaction.is_reaction())
+        self.assertEqual(reaction.final_nuclide_id, NuclideId('Zirconium_96'))
+
+    def test_queries(self):
+        nuclides = self.fixture.nuclides_with('mass_excess',
+                                              'cumulative_yield')
+        self.assertEqual([str(nuclide.id) for nuclide in nuclides],
+                         ['Strontium_96'])
+        (ids, values) = self.fixture.nuclide_column('mass_excess')
+        self.assertEqual(ids.name.tolist(),
+                         ['Rubidium_96', 'Strontium_96', 'Yttrium_96'])
+        self.assertEqual(values.dtype, float)
+        self.assertEqual(values.tolist(), [-61.2, -72.9, -65.5])
+
+    def test_remove(self):
+        self.fixture.remove([NuclideId('Rubidium_96')])
+        (ids, values) = self.fixture.nuclide_column('mass_excess')
+        self.assertEqual(len(ids), 2)
+        self.assertEqual(len(self.fixture.nuclides_with('mass_excess')), 2)
+
+if '__main__'==__name__:
+    unittest.main()
@@ -32,5 +32,57 @@ class TestNuclide(unittest.TestCase):
     def test_nuclide_name(self):
         self.assertEqual(self.fixture.name,'Yttrium_96')
 
+    def test_lazy(self):
+        calls = []
+        def thunk(nuclide):
+            calls.append(nuclide.id)
+            nuclide['mass_excess'] = -65.2
+        self.fixture.set_lazy(['mass_excess', 'half_life'], thunk)
+        self.assertTrue(self.fixture.is_lazy('mass_excess'))
+        self.assertEqual(self.fixture['mass_excess'], -65.2)
+        self.assertFalse(self.fixture.has_key('half_life'))
+        self.assertEqual(self.fixture.get('half_life', 0), 0)
+        self.assertRaises(KeyError, self.fixture.__getitem__, 'half_life')
+        self.assertEqual(len(calls), 1)
+
+    def test_lazy_replaced(self):
+        def thunk(nuclide):
+            nuclide['mass_excess'] = -65.2
+        self.fixture.set_lazy(['mass_excess'], thunk)
+        self.fixture['mass_excess'] = -1.0
+        self.assertEqual(self.fixture.items(), [('mass_excess', -1.0)])
+
+    def test_lazy_dict_methods(self):
+        def thunk(nuclide):
+            nuclide['mass_excess'] = -65.2
+            nuclide['half_life'] = 5.3
+        for (method, expected) in [
+            (dict, {'mass_excess':-65.2, 'half_life':5.3}),
+            (lambda nuclide: nuclide.copy(),
+             {'mass_excess':-65.2, 'half_life':5.3}),
+            (lambda nuclide: sorted(nuclide.iteritems()),
+             [('half_life', 5.3), ('mass_excess', -65.2)]),
+            (lambda nuclide: sorted(nuclide.iterkeys()),
+             ['half_life', 'mass_excess']),
+            (lambda nuclide: nuclide == {'mass_excess':-65.2,
+                                         'half_life':5.3}, True),
+            (lambda nuclide: eval(repr(nuclide)),
+             {'mass_excess':-65.2, 'half_life':5.3}),
+            (lambda nuclide: nuclide.pop('half_life'), 5.3)]:
+            nuclide = Nuclide(self.fixture.id)
+            nuclide.set_lazy(['mass_excess', 'half_life'], thunk)
+            self.assertEqual(method(nuclide), expected)
+
+    def test_lazy_setdefault(self):
+        def thunk(nuclide):
+            nuclide['mass_excess'] = -65.2
+        self.fixture.set_lazy(['mass_excess', 'half_life'], thunk)
+        self.assertEqual(self.fixture.setdefault('half_life', 1.0), 1.0)
+        self.assertEqual(self.fixture.setdefault('mass_excess', 0.), -65.2)
+        self.assertFalse(self.fixture.is_lazy('half_life'))
+        self.assertEqual(self.fixture['half_life'], 1.0)
+        del self.fixture['half_life']
+        self.assertEqual(self.fixture.pop('half_life', None), None)
+
 if '__main__'==__name__:
     unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+
+from numpy import linspace, allclose
+
+from oklo.core.ids import NuclideId, ReactionId
+from oklo.core.defs import ReactionType
+from oklo.core.reaction import Reaction
+from oklo.core.network import ReactionNetwork
+from oklo.core.units import MeV
+from oklo.utils.betadecay import BetaDecayBranch, BetaDecaySpectrum
+from oklo.utils.parallel import compute_all_spectra
+
+class TestComputeAllSpectra(unittest.TestCase):
+
+    def setUp(self):
+        reactions = []
+        for (A, e0s) in [(94, [5.0, 2.0]), (95, [6.0]), (96, [7.1, 3.0, 1.0]),
+                         (97, [6.7])]:
+            reac_id = ReactionId(NuclideId(Z=39, A=A), ReactionType.BetaDecay)
+            branches = [BetaDecayBranch(reaction_id=reac_id, e0=e0*MeV,
+                                        sigma_e0=0, fraction=1.0/len(e0s),
+                                        sigma_fraction=0)
+                        for e0 in e0s]
+            reaction = Reaction(reac_id)
+            reaction['beta_decay'] = BetaDecaySpectrum(
+                reaction_id=reac_id, q_value=max(e0s)*MeV, half_life=1.0,
+                branches=branches)
+            reactions.append(reaction)
+        self.fixture = ReactionNetwork('TestNetwork', reactions)
+        self.energies = linspace(0*MeV, 10*MeV, 1001)
+
+    def tearDown(self):
+        del self.fixture
+
+    def test_parallel(self):
+        (reaction_ids, spectra) = compute_all_spectra(self.fixture,
+                                                      self.energies,
+                                                      workers=2)
+        self.assertEqual(spectra.shape, (4, len(self.energies)))
+        for (reac_id, spectrum) in zip(reaction_ids, spectra):
+            decay = self.fixture.get(reac_id)['beta_decay']
+            self.assertTrue(allclose(decay.antineutrino_spectrum(self.energies),
+                                     spectrum))
+
+if '__main__'==__name__:
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+
+from numpy import isnan, flatnonzero, array_equal
+
+from oklo.core.units import keV
+from oklo.utils.parsers import read_mass_eval_table, parse_mass_eval_table
+
+class TestMassEvalTable(unittest.TestCase):
+
+    def setUp(self):
+        self.fixture = read_mass_eval_table('data/mass.mas12')
+
+    def tearDown(self):
+        del self.fixture
+
+    def row(self, Z, A):
+        return self.fixture[flatnonzero((self.fixture['Z'] == Z)
+                                        & (self.fixture['A'] == A))[0]]
+
+    def test_columns(self):
+        neutron = self.row(0, 1)
+        self.assertAlmostEqual(neutron['mass_excess'], 8071.31714*keV)
+        self.assertAlmostEqual(neutron['beta_decay_energy'], 782.347*keV)
+        self.assertAlmostEqual(neutron['atomic_mass'] / neutron['mass_excess'],
+                               939.56537865 / 8.07131714, places=6)
+
+    def test_estimated(self):
+        Li_3 = self.row(3, 3)
+        self.assertTrue(Li_3['estimated'])
+        self.assertAlmostEqual(Li_3['mass_excess'], 28667*keV)
+        self.assertFalse(self.row(1, 3)['estimated'])
+
+    def test_not_calculable(self):
+        self.assertTrue(isnan(self.row(1, 1)['beta_decay_energy']))
+
+    def test_selected_columns(self):
+        table = read_mass_eval_table('data/mass.mas12',
+                                     ['Z', 'A', 'atomic_mass', 'estimated'])
+        self.assertEqual(table.dtype.names,
+                         ('Z', 'A', 'estimated', 'atomic_mass'))
+        for name in table.dtype.names:
+            self.assertTrue(array_equal(table[name], self.fixture[name]))
+
+    def test_nuclide_list(self):
+        nuclides = parse_mass_eval_table('data/mass.mas12')
+        self.assertEqual(len(nuclides), len(self.fixture))
+        self.assertEqual(str(nuclides[0]['id']), 'Neutron_1')
+
+if '__main__'==__name__:
+    unittest.main()
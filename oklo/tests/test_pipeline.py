@@ -0,0 +1,135 @@
+import unittest
+import os
+import shutil
+import tempfile
+
+from numpy import array
+
+from oklo.core.ids import NuclideId
+from oklo.core.model import NuclideModel
+from oklo.core.factory import NuclideFactory
+from oklo.core.network import ReactionNetwork
+from oklo.core.pipeline import Pipeline, _missing_sources
+from oklo.utils import datacache
+
+class KeyModel(NuclideModel):
+    '''Nuclide model for testing, which sets one key'''
+    def __init__(self, **kwargs):
+        NuclideModel.__init__(self, **kwargs)
+        self._ids = [NuclideId(name) for name in kwargs['names']]
+        self._key = kwargs['key']
+        self._requires = kwargs.get('requires')
+        self.loads = 0
+
+    def _load_data(self):
+        self.loads += 1
+
+    def known_ids(self):
+        return self._ids
+
+    def process(self, nuclide):
+        if self._requires is not None:
+            # Fails unless the required key was set first
+            nuclide[self._key] = nuclide[self._requires] + 1
+        else:
+            nuclide[self._key] = 1
+
+def count_lines(filenames):
+    '''Parser for testing: count the lines of data files'''
+    import pkg_resources
+    return {'lines':array([len(pkg_resources.resource_string(
+        'oklo', filename).splitlines()) for filename in filenames])}
+
+class SourceModel(KeyModel):
+    '''Nuclide model for testing, which loads one data file through the
+       data cache'''
+    def __init__(self, **kwargs):
+        KeyModel.__init__(self, **kwargs)
+        self._filename = kwargs['filename']
+        self.lines = None
+
+    def data_sources(self):
+        return [(count_lines, [self._filename], 1)]
+
+    def _load_data(self):
+        KeyModel._load_data(self)
+        self.lines = datacache.load_cached(count_lines, [self._filename],
+                                           1)['lines'][0]
+
+def make_factory(name, names, key, requires=None):
+    model = KeyModel(name=name, names=names, key=key, requires=requires)
+    depends_on = []
+    if requires is not None:
+        depends_on = [requires]
+    return NuclideFactory(name=key, depends_on=depends_on,
+                          model_list=[{'model':model, 'scope':'default'}])
+
+class TestPipeline(unittest.TestCase):
+
+    def setUp(self):
+        self.fixture = [
+            make_factory('Derived', ['Yttrium_96'], 'derived', 'base'),
+            make_factory('Base', ['Yttrium_96', 'Strontium_96'], 'base'),
+            make_factory('Other', ['Rubidium_96'], 'other')]
+
+    def tearDown(self):
+        del self.fixture
+
+    def test_order(self):
+        pipeline = Pipeline(self.fixture)
+        self.assertEqual([factory.name for factory in pipeline.factories],
+                         ['base', 'derived', 'other'])
+
+    def test_process(self):
+        pipeline = Pipeline(self.fixture, threads=2, processes=1)
+        network = ReactionNetwork('TestNetwork')
+        stats = pipeline.process(network)
+        self.assertEqual(network.get(NuclideId('Yttrium_96'))['derived'], 2)
+        self.assertEqual(len(network), 3)
+        self.assertEqual(stats['factories']['base']['added'], 2)
+        self.assertEqual(stats['factories']['derived']['processed'], 2)
+        for model in pipeline.models():
+            self.assertEqual(model.loads, 1)
+        pipeline.process(ReactionNetwork('TestNetwork'))
+        for model in pipeline.models():
+            self.assertEqual(model.loads, 1)
+
+    def test_parse_sources(self):
+        (saved_cache_dir, saved_cache_enabled) = (datacache.cache_dir,
+                                                  datacache.cache_enabled)
+        datacache.cache_dir = tempfile.mkdtemp()
+        datacache.cache_enabled = True
+        try:
+            factories = []
+            for (key, filename) in [('masses', 'data/mass.mas12'),
+                                    ('isomers', 'data/isomers_nndc.py')]:
+                model = SourceModel(name=key, names=['Yttrium_96'], key=key,
+                                    filename=filename)
+                factories.append(NuclideFactory(
+                    name=key, model_list=[{'model':model,
+                                           'scope':'default'}]))
+            pipeline = Pipeline(factories, processes=2)
+            sources = sum([model.data_sources()
+                           for model in pipeline.models()], [])
+            self.assertEqual(len(_missing_sources(sources)), 2)
+            # Parsed into the cache by the worker processes
+            pipeline._parse_sources(sources)
+            self.assertEqual(_missing_sources(sources), [])
+            self.assertEqual(len(os.listdir(datacache.cache_dir)), 2)
+            pipeline.process(ReactionNetwork('TestNetwork'))
+            for (model, (parser, filenames, version)) in zip(
+                pipeline.models(), sources):
+                self.assertEqual(model.lines, count_lines(filenames)['lines'])
+        finally:
+            shutil.rmtree(datacache.cache_dir)
+            (datacache.cache_dir,
+             datacache.cache_enabled) = (saved_cache_dir, saved_cache_enabled)
+
+    def test_bad_dependencies(self):
+        self.assertRaises(ValueError, Pipeline, self.fixture[:1])
+        cycle = [make_factory('A', [], 'a', 'b'),
+                 make_factory('B', [], 'b', 'a')]
+        self.assertRaises(ValueError, Pipeline, cycle)
+
+if '__main__'==__name__:
+    unittest.main()
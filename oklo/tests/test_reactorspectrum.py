@@ -0,0 +1,112 @@
+import unittest
+
+from numpy import linspace, array, allclose
+
+from oklo.core.ids import NuclideId, ReactionId, NuclideIdArray
+from oklo.core.defs import ReactionType
+from oklo.core.nuclide import Nuclide
+from oklo.core.reaction import Reaction
+from oklo.core.network import ReactionNetwork
+from oklo.core.units import MeV
+from oklo.core.chart import NuclideChart
+from oklo.utils.reactorspectrum import ReactorSpectrumBasis
+from oklo.tests.helpers import make_decay
+
+U_235 = NuclideId('Uranium_235')
+Pu_239 = NuclideId('Plutonium_239')
+
+class TestReactorSpectrumBasis(unittest.TestCase):
+
+    def setUp(self):
+        elements = []
+        daughters = [('Yttrium_96', {U_235:0.06, Pu_239:0.02}, 7.1),
+                     ('Rubidium_96', {U_235:0.03}, 11.5),
+                     ('Strontium_96', {Pu_239:0.04}, None)]
+        for (name, yields, e0) in daughters:
+            nuclide = Nuclide(NuclideId(name))
+            nuclide['cumulative_yield'] = yields
+            elements.append(nuclide)
+            if e0 is None: continue
+            reaction = Reaction(ReactionId(nuclide.id,
+                                           ReactionType.BetaDecay))
+            reaction['beta_decay'] = make_decay(name, [e0])
+            elements.append(reaction)
+        self.fixture = ReactionNetwork('TestNetwork', elements)
+        self.energies = linspace(0*MeV, 12*MeV, 1201)
+        self.basis = ReactorSpectrumBasis(self.fixture, self.energies,
+                                          [U_235, Pu_239])
+
+    def tearDown(self):
+        del self.fixture
+        del self.basis
+
+    def test_spectrum(self):
+        fractions = {U_235:0.7, Pu_239:0.3}
+        expected = 0
+        for nuclide in self.fixture.nuclides:
+            reac_id = ReactionId(nuclide.id, ReactionType.BetaDecay)
+            if not self.fixture.has_id(reac_id): continue
+            decay_rate = sum([fractions[parent] * fiss_yield for
+                              (parent, fiss_yield)
+                              in nuclide['cumulative_yield'].items()])
+            decay = self.fixture.get(reac_id)['beta_decay']
+            expected += decay_rate * decay.antineutrino_spectrum(self.energies)
+        self.assertTrue(allclose(self.basis.spectrum(fractions), expected))
+
+    def test_time_series(self):
+        fractions = array([[0.7, 0.3], [0.5, 0.5], [0.0, 1.0]])
+        spectra = self.basis.spectrum(fractions)
+        self.assertEqual(spectra.shape, (3, len(self.energies)))
+        for (step_fractions, spectrum) in zip(fractions, spectra):
+            self.assertTrue(allclose(self.basis.spectrum(step_fractions),
+                                     spectrum))
+
+    def test_missing_decays(self):
+        missing = self.basis.missing_decays({U_235:0.7, Pu_239:0.3})
+        self.assertEqual(len(missing), 1)
+        self.assertEqual(str(missing[0]['reac_id']),
+                         'Strontium_96_BetaDecay_to_Yttrium_96')
+        self.assertTrue(allclose(missing[0]['decay_rate'], 0.3*0.04))
+
+    def test_threshold(self):
+        chart = NuclideChart(Z_max=40, N_max=60)
+        chart.set('mass_excess', NuclideIdArray.from_names(
+            ['Strontium_96', 'Yttrium_96']), [-72.9*MeV, -73.9*MeV])
+        basis = ReactorSpectrumBasis(self.fixture, self.energies,
+                                     [U_235, Pu_239], chart=chart)
+        self.assertEqual([str(nucl_id) for nucl_id in basis.daughter_ids],
+                         ['Rubidium_96', 'Yttrium_96'])
+        self.assertEqual(basis.missing_decays({U_235:0.7, Pu_239:0.3}), [])
+
+    def test_electron_spectrum(self):
+        fractions = {U_235:0.7, Pu_239:0.3}
+        expected = 0
+        for nuclide in self.fixture.nuclides:
+            reac_id = ReactionId(nuclide.id, ReactionType.BetaDecay)
+            if not self.fixture.has_id(reac_id): continue
+            decay_rate = sum([fractions[parent] * fiss_yield for
+                              (parent, fiss_yield)
+                              in nuclide['cumulative_yield'].items()])
+            decay = self.fixture.get(reac_id)['beta_decay']
+            expected += decay_rate * decay.electron_spectrum(self.energies)
+        self.assertTrue(allclose(self.basis.electron_spectrum(fractions),
+                                 expected))
+        basis = ReactorSpectrumBasis(self.fixture, self.energies,
+                                     [U_235, Pu_239], electron=True)
+        self.assertTrue(allclose(basis.electron_spectrum(fractions),
+                                 expected))
+        self.assertTrue(allclose(basis.matrix, self.basis.matrix))
+
+    def test_sampler(self):
+        from oklo.utils.sampling import make_rng
+        sampler = self.basis.sampler({U_235:0.7, Pu_239:0.3})
+        samples = sampler.sample(10000, make_rng(5))
+        names = [str(reac_id.initial_nuclide_id)
+                 for reac_id in sampler.reaction_ids]
+        self.assertEqual(sorted(names), ['Rubidium_96', 'Yttrium_96'])
+        fraction = (samples['decay'] == names.index('Yttrium_96')).mean()
+        rate_Y = 0.7*0.06 + 0.3*0.02
+        self.assertTrue(abs(fraction - rate_Y/(rate_Y + 0.7*0.03)) < 0.02)
+
+if '__main__'==__name__:
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+
+from numpy import linspace, array, allclose, bincount, histogram, arange
+
+from oklo.core.units import MeV
+from oklo.utils.sampling import AliasTable, BetaDecaySampler, make_rng
+from oklo.tests.helpers import make_decay
+
+class TestAliasTable(unittest.TestCase):
+
+    def test_frequencies(self):
+        weights = array([1., 0., 3., 6.])
+        table = AliasTable(weights)
+        counts = bincount(table.sample(200000, make_rng(1)), minlength=4)
+        self.assertEqual(counts[1], 0)
+        self.assertTrue(allclose(counts / 200000., weights / weights.sum(),
+                                 atol=0.005))
+
+    def test_bad_weights(self):
+        self.assertRaises(ValueError, AliasTable, [0., 0.])
+        self.assertRaises(ValueError, AliasTable, [1., -1.])
+
+class TestBetaDecaySampler(unittest.TestCase):
+
+    def setUp(self):
+        self.fixture = [make_decay('Yttrium_96', [7.1, 3.0], [0.8, 0.2]),
+                        make_decay('Rubidium_96', [11.5], [1.0])]
+        self.rates = [1.0, 3.0]
+
+    def tearDown(self):
+        del self.fixture
+
+    def test_reproducible(self):
+        sampler = BetaDecaySampler(self.fixture, self.rates)
+        first = sampler.antineutrino_energies(1000, make_rng(7))
+        second = sampler.antineutrino_energies(1000, make_rng(7))
+        self.assertTrue((first == second).all())
+
+    def test_decays(self):
+        sampler = BetaDecaySampler(self.fixture, self.rates)
+        samples = sampler.sample(100000, make_rng(2))
+        counts = bincount(samples['decay'], minlength=2) / 100000.
+        self.assertTrue(allclose(counts, [0.25, 0.75], atol=0.01))
+        e0 = array([7.1, 3.0, 11.5])*MeV
+        self.assertTrue(allclose(samples['antineutrino_energy']
+                                 + samples['electron_energy'],
+                                 e0[samples['branch']]))
+
+    def test_spectrum(self):
+        sampler = BetaDecaySampler(self.fixture, self.rates)
+        energies = sampler.antineutrino_energies(400000, make_rng(3))
+        bin_edges = linspace(0*MeV, 12*MeV, 25)
+        (counts, edges) = histogram(energies, bin_edges)
+        expected = sum([rate * decay.binned_spectrum(bin_edges)
+                        for (rate, decay) in zip(self.rates, self.fixture)])
+        expected *= 400000 / sum(self.rates)
+        self.assertTrue((abs(counts - expected)
+                         < 5 * expected**0.5 + 1).all())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+import shutil
+import tempfile
+
+from numpy import linspace, allclose, memmap
+
+from oklo.core.units import MeV
+from oklo.utils.spectrumstore import SpectrumStore
+from oklo.tests.helpers import make_decay
+
+class TestSpectrumStore(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.energies = linspace(0*MeV, 12*MeV, 1201)
+        self.fixture = [make_decay('Yttrium_96', [7.1, 3.0]),
+                        make_decay('Rubidium_96', [11.5])]
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_store(self):
+        store = SpectrumStore.open(self.fixture, self.energies,
+                                   self.directory)
+        self.assertTrue(isinstance(store.spectra, memmap))
+        for decay in self.fixture:
+            self.assertTrue(allclose(store.spectrum(decay.reaction_id),
+                                     decay.antineutrino_spectrum(
+                                         self.energies)))
+        # Re-opening attaches to the same file
+        other = SpectrumStore.open(self.fixture, self.energies,
+                                   self.directory)
+        self.assertEqual(other.filename, store.filename)
+        # Different energies use a different file
+        other = SpectrumStore.open(self.fixture, self.energies[:-1],
+                                   self.directory)
+        self.assertNotEqual(other.filename, store.filename)
+
+    def test_attach(self):
+        store = SpectrumStore.open(self.fixture, self.energies,
+                                   self.directory)
+        store.attach(self.fixture)
+        spectrum = self.fixture[0].antineutrino_spectrum(self.energies)
+        self.assertTrue(isinstance(spectrum, memmap))
+        self.assertFalse(spectrum.flags.writeable)
+
+if '__main__'==__name__:
+    unittest.main()
@@ -0,0 +1,259 @@
+from oklo.core.ids import NuclideIdArray
+import numpy
+##########################################################################
+# Time-dependent nuclide inventories
+#
+# Inventories N obey dN/dt = A N, for the decay matrix A, so that
+# N(t) = exp(A t) N(0).  The exponential is evaluated by a rational
+# approximation, accurate on the whole negative real axis where the
+# eigenvalues (minus the decay constants) lie:
+#
+#   exp(z) ~ sum_k c_k / (s_k - z)
+#
+# from quadrature of the Cauchy integral of exp along an optimized
+# Talbot contour (Trefethen, Weideman and Schmelzer, BIT 46 (2006) 653).
+# With 24 nodes, in 12 conjugate pairs, the error is below 1e-13.  Each
+# node requires one shifted linear solve, (s_k - A t) x = N(0).
+#
+# Decays lower the nuclear mass, so the decay network has no cycles.
+# Ordered by depth in the network, A is triangular, and each solve is
+# a forward substitution done at once for all nuclides of equal depth.
+
+CONTOUR_POINTS = 24
+
+def talbot_nodes(points=CONTOUR_POINTS):
+    '''Return the nodes and weights in the upper half plane of the
+       rational approximation to exp on the negative real axis'''
+    theta = -numpy.pi + (numpy.arange(points) + 0.5) * 2*numpy.pi / points
+    theta = theta[theta > 0]
+    nodes = points * (0.5017*theta / numpy.tan(0.6407*theta) - 0.6122
+                      + 0.2645j*theta)
+    derivs = points * (0.5017 / numpy.tan(0.6407*theta)
+                       - 0.5017*0.6407*theta / numpy.sin(0.6407*theta)**2
+                       + 0.2645j)
+    weights = numpy.exp(nodes) * derivs / (1j*points)
+    return (nodes, weights)
+
+##########################################################################
+
+class DecayMatrix(object):
+    '''Sparse decay matrix of a set of nuclides.
+
+       Stored as a list of transitions (parent, daughter, partial decay
+       constant), by index in the sorted nuclide ids.  Daughters which
+       are not tracked have index -1; their parents still decay.  The
+       matrix element (daughter, parent) is the sum of the partial decay
+       constants, and the diagonal is minus the total decay constant.
+    '''
+    def __init__(self, nucl_ids, parents, daughters, decay_constants):
+        '''Constructor.  Specify sorted, unique nuclide ids, and the
+           parent index, daughter index and partial decay constant of
+           each transition.'''
+        self._nucl_ids = NuclideIdArray(nucl_ids)
+        self._parents = numpy.array(parents, dtype=int).reshape(-1)
+        self._daughters = numpy.array(daughters, dtype=int).reshape(-1)
+        self._partial = numpy.array(decay_constants, dtype=float).reshape(-1)
+        if not (len(self._parents) == len(self._daughters)
+                == len(self._partial)):
+            raise ValueError('Transitions need a parent, daughter and decay '
+                             'constant')
+        self._decay_constants = numpy.bincount(self._parents,
+                                               weights=self._partial,
+                                               minlength=len(self._nucl_ids))
+        return
+
+    @classmethod
+    def from_decays(cls, decays, nucl_ids=None):
+        '''Build from BetaDecaySpectrum objects, with total decay constant
+           ln(2)/half_life for each.  The beta decay takes the fraction of
+           it given by the sum of the branch fractions (at most 1, and all
+           of it for decays without branches); the remainder goes to
+           other, untracked decay modes.  Nuclides default to the parents
+           and daughters of the decays.'''
+        parent_ids = NuclideIdArray([decay.reaction_id.initial_nuclide_id
+                                     for decay in decays])
+        daughter_ids = NuclideIdArray([decay.reaction_id.final_nuclide_id
+                                       for decay in decays])
+        if nucl_ids is None:
+            nucl_ids = parent_ids.union(daughter_ids)
+        nucl_ids = NuclideIdArray(nucl_ids).unique()
+        parents = nucl_ids.index(parent_ids)
+        if (parents < 0).any():
+            raise ValueError('Decaying nuclides missing from nuclide ids')
+        decay_constants = numpy.log(2) / numpy.array(
+            [decay.half_life for decay in decays], dtype=float)
+        beta_fractions = numpy.array(
+            [sum([branch.fraction for branch in decay.branches()])
+             if len(decay.branches()) > 0 else 1. for decay in decays],
+            dtype=float).clip(0, 1)
+        # Other decay modes, where the branches do not add up
+        other = beta_fractions < 1
+        return cls(nucl_ids,
+                   numpy.concatenate((parents, parents[other])),
+                   numpy.concatenate((nucl_ids.index(daughter_ids),
+                                      -numpy.ones(other.sum(), dtype=int))),
+                   numpy.concatenate((decay_constants * beta_fractions,
+                                      decay_constants[other]
+                                      * (1 - beta_fractions[other]))))
+
+    @property
+    def nuclide_ids(self):
+        '''Return the ids of the nuclides, in matrix order'''
+        return self._nucl_ids
+
+    @property
+    def parents(self):
+        '''Return the parent nuclide index of each transition'''
+        return self._parents
+
+    @property
+    def daughters(self):
+        '''Return the daughter nuclide index of each transition, or -1'''
+        return self._daughters
+
+    @property
+    def partial_decay_constants(self):
+        '''Return the decay constant of each transition'''
+        return self._partial
+
+    @property
+    def decay_constants(self):
+        '''Return the total decay constant of each nuclide'''
+        return self._decay_constants
+
+    def __len__(self):
+        return len(self._nucl_ids)
+
+    def index(self, nucl_ids):
+        '''Return the matrix index of each nuclide, or -1 if absent'''
+        return self._nucl_ids.index(nucl_ids)
+
+    def inventory(self, amounts):
+        '''Convert a dictionary of amounts by nuclide id to an array'''
+        inventory = numpy.zeros(len(self._nucl_ids))
+        for (nucl_id, amount) in amounts.items():
+            index = self.index([nucl_id])[0]
+            if index < 0:
+                raise KeyError(nucl_id)
+            inventory[index] += amount
+        return inventory
+
+    def dot(self, inventories):
+        '''Return dN/dt for inventories (along their last axis)'''
+        inventories = numpy.asarray(inventories, dtype=float)
+        rates = -self._decay_constants * inventories
+        tracked = self._daughters >= 0
+        gains = (self._partial[tracked]
+                 * inventories[..., self._parents[tracked]])
+        # Sum the gains of each daughter, over the last axis
+        numpy.add.at(numpy.rollaxis(rates, -1), self._daughters[tracked],
+                     numpy.rollaxis(gains, -1))
+        return rates
+
+    def activities(self, inventories):
+        '''Return the decay rate of each nuclide in inventories'''
+        return self._decay_constants * numpy.asarray(inventories, dtype=float)
+
+    def todense(self):
+        '''Return the decay matrix as a dense array'''
+        matrix = numpy.diag(-self._decay_constants)
+        tracked = self._daughters >= 0
+        numpy.add.at(matrix, (self._daughters[tracked],
+                              self._parents[tracked]),
+                     self._partial[tracked])
+        return matrix
+
+##########################################################################
+
+class BatemanSolver(object):
+    '''Evolve nuclide inventories under a DecayMatrix, for many initial
+       inventories and times in one batch.  See the notes above.'''
+    def __init__(self, decay_matrix, points=CONTOUR_POINTS):
+        '''Constructor'''
+        self._matrix = decay_matrix
+        (self._nodes, self._weights) = talbot_nodes(points)
+        self._levels = self._order_levels()
+        return
+
+    @property
+    def decay_matrix(self):
+        '''Return the decay matrix'''
+        return self._matrix
+
+    def _order_levels(self):
+        '''Return, for each depth in the decay network, the nuclides at
+           that depth and the transitions feeding them'''
+        matrix = self._matrix
+        n_nucl = len(matrix)
+        tracked = matrix.daughters >= 0
+        (parents, daughters, partial) = (matrix.parents[tracked],
+                                         matrix.daughters[tracked],
+                                         matrix.partial_decay_constants[
+                                             tracked])
+        remaining = numpy.bincount(daughters, minlength=n_nucl)
+        depth = numpy.zeros(n_nucl, dtype=int) - 1
+        current = numpy.flatnonzero(remaining == 0)
+        level = 0
+        while len(current) > 0:
+            depth[current] = level
+            fed = daughters[numpy.in1d(parents, current)]
+            remaining -= numpy.bincount(fed, minlength=n_nucl)
+            current = numpy.flatnonzero((remaining == 0) & (depth < 0))
+            level += 1
+        if (depth < 0).any():
+            raise ValueError('Decay network contains a cycle')
+        levels = []
+        for level in range(depth.max() + 1 if n_nucl else 0):
+            nuclides = numpy.flatnonzero(depth == level)
+            feeding = numpy.flatnonzero(depth[daughters] == level)
+            # Daughter position within the level
+            position = numpy.searchsorted(nuclides, daughters[feeding])
+            levels.append((nuclides, parents[feeding], position,
+                           partial[feeding]))
+        return levels
+
+    def solve(self, inventories, times):
+        '''Return inventories after each time.  Inventories has shape
+           (..., nuclides), and the result (times, ..., nuclides).'''
+        inventories = numpy.asarray(inventories, dtype=float)
+        times = numpy.asarray(times, dtype=float).reshape(-1)
+        if (times < 0).any():
+            raise ValueError('Times must not be negative')
+        n_nucl = len(self._matrix)
+        if inventories.shape[-1] != n_nucl:
+            raise ValueError('Expected inventories of %d nuclides, got %d'
+                             % (n_nucl, inventories.shape[-1]))
+        batch_shape = inventories.shape[:-1]
+        initial = inventories.reshape((1, -1, n_nucl))
+        result = numpy.empty((len(times),) + initial.shape[1:])
+        result[times == 0] = initial
+        active = times > 0
+        if active.any():
+            scaled_times = times[active][:, numpy.newaxis, numpy.newaxis]
+            evolved = 0
+            for (node, weight) in zip(self._nodes, self._weights):
+                # exp(A t) N ~ sum over nodes of c/t (s/t - A)^-1 N
+                shifted = self._shifted_solve(node / scaled_times, initial)
+                evolved = evolved + 2 * (weight / scaled_times
+                                         * shifted).real
+            result[active] = evolved
+        return result.reshape((len(times),) + batch_shape + (n_nucl,))
+
+    def _shifted_solve(self, shift, rhs):
+        '''Solve (shift - A) x = rhs, by forward substitution over the
+           levels of the decay network'''
+        decay_constants = self._matrix.decay_constants
+        solution = numpy.zeros(numpy.broadcast(shift, rhs).shape,
+                               dtype=complex)
+        for (nuclides, parents, position, partial) in self._levels:
+            feed = numpy.zeros(solution.shape[:-1] + (len(nuclides),),
+                               dtype=complex)
+            if len(parents) > 0:
+                numpy.add.at(numpy.rollaxis(feed, -1), position,
+                             numpy.rollaxis(partial
+                                            * solution[..., parents], -1))
+            solution[..., nuclides] = ((rhs[..., nuclides] + feed)
+                                       / (shift + decay_constants[nuclides]))
+        return solution
+
+##########################################################################
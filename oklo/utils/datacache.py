@@ -0,0 +1,102 @@
+import os
+import hashlib
+import zipfile
+import numpy
+##########################################################################
+# Binary on-disk cache for parsed nuclear data files
+#
+# Parsers which return a dictionary of numpy arrays can be wrapped with
+# load_cached().  The parsed arrays are stored as a .npz file, keyed by
+# the parser name, parser version, and a hash of the contents of the
+# source data files.  Editing a data file or bumping the parser version
+# therefore invalidates the cached copy automatically.
+#
+# The cache location may be set with the OKLO_CACHE_DIR environment
+# variable, and the cache disabled by setting OKLO_CACHE=0.
+
+cache_dir = os.environ.get('OKLO_CACHE_DIR',
+                           os.path.join(os.path.expanduser('~'),
+                                        '.oklo', 'cache'))
+cache_enabled = os.environ.get('OKLO_CACHE', '1') != '0'
+
+def load_cached(parser, filenames, version, use_cache=True):
+    '''Return parser(filenames), loading the parsed arrays from the
+    on-disk cache if available, and adding them to the cache otherwise.
+    '''
+    if not (use_cache and cache_enabled):
+        return parser(filenames)
+    cache_file = cache_filename(parser, filenames, version)
+    if os.path.exists(cache_file):
+        try:
+            return read_arrays(cache_file)
+        except (IOError, ValueError, KeyError, zipfile.BadZipfile):
+            # Unreadable cache file; parse again and overwrite below
+            pass
+    arrays = parser(filenames)
+    write_arrays(cache_file, arrays)
+    return arrays
+
+def cache_filename(parser, filenames, version):
+    '''Return the cache file for parser(filenames)'''
+    return os.path.join(cache_dir, '%s_%s.npz' % (
+        parser.__name__, cache_key(filenames, version)))
+
+# Cache keys already computed, by version and data file name, size and
+# modification time
+_cache_keys = {}
+
+def cache_key(filenames, version):
+    '''Return a hash of the parser version and data file contents'''
+    import pkg_resources
+    stats = []
+    for filename in filenames:
+        if not pkg_resources.resource_exists('oklo',filename):
+            raise ValueError('Data file "%s" does not exist' % (filename))
+        stat = os.stat(pkg_resources.resource_filename('oklo',filename))
+        stats.append((filename, stat.st_size, stat.st_mtime))
+    memo_key = (str(version), tuple(stats))
+    if _cache_keys.has_key(memo_key):
+        return _cache_keys[memo_key]
+    hasher = hashlib.sha1()
+    hasher.update(str(version))
+    for filename in filenames:
+        hasher.update(pkg_resources.resource_string('oklo',filename))
+    _cache_keys[memo_key] = hasher.hexdigest()
+    return _cache_keys[memo_key]
+
+def read_arrays(cache_file):
+    '''Read dictionary of arrays from a cache file'''
+    arrays = {}
+    npz_file = numpy.load(cache_file)
+    try:
+        for name in npz_file.files:
+            arrays[name] = npz_file[name]
+    finally:
+        npz_file.close()
+    return arrays
+
+def write_arrays(cache_file, arrays):
+    '''Write dictionary of arrays to a cache file.  Failure to write (for
+    example, a read-only cache directory) is not an error.'''
+    import tempfile
+    tmp_file = None
+    try:
+        if not os.path.isdir(os.path.dirname(cache_file)):
+            os.makedirs(os.path.dirname(cache_file))
+        # Write to a temporary file first, so that concurrent readers
+        # never see a partially written cache file
+        (tmp_fd, tmp_file) = tempfile.mkstemp(
+            dir=os.path.dirname(cache_file), suffix='.npz')
+        with os.fdopen(tmp_fd, 'wb') as tmp:
+            numpy.savez(tmp, **arrays)
+        os.rename(tmp_file, cache_file)
+    except (IOError, OSError):
+        # Do not leave the partial file behind (e.g. on a full disk)
+        if tmp_file is not None:
+            try:
+                os.remove(tmp_file)
+            except OSError:
+                pass
+    return
+
+##########################################################################
@@ -0,0 +1,315 @@
+import numpy
+import itertools
+import threading
+import weakref
+##########################################################################
+
+class EnergyGrid(object):
+    '''An immutable grid of energies at which spectra are evaluated.
+
+       The hash of the energy values is computed once on construction,
+       so grids can be used as cheap dictionary keys for caching
+       spectra.  Spacing metadata and trapezoidal integration weights
+       are precomputed as well.
+    '''
+    def __init__(self, energies):
+        '''Constructor'''
+        self._energies = numpy.array(energies, dtype=float).reshape(-1)
+        self._energies.flags.writeable = False
+        self._hash = hash(self._energies.tostring())
+        spacing = numpy.diff(self._energies)
+        spacing.flags.writeable = False
+        self._spacing = spacing
+        self._step = None
+        if len(spacing) > 0 and numpy.allclose(spacing, spacing[0],
+                                               rtol=1e-9, atol=0):
+            self._step = float(spacing[0])
+        # Trapezoidal integration weights
+        weights = numpy.zeros(len(self._energies))
+        weights[:-1] += spacing / 2.
+        weights[1:] += spacing / 2.
+        weights.flags.writeable = False
+        self._weights = weights
+        return
+
+    @classmethod
+    def linspace(cls, start, stop, num):
+        '''Construct a uniform grid, as numpy.linspace'''
+        return cls(numpy.linspace(start, stop, num))
+
+    @property
+    def energies(self):
+        '''Return the (read-only) array of energies'''
+        return self._energies
+
+    @property
+    def spacing(self):
+        '''Return the differences between neighbouring energies'''
+        return self._spacing
+
+    @property
+    def step(self):
+        '''Return the energy step of a uniform grid, or None'''
+        return self._step
+
+    def is_uniform(self):
+        '''Check if the energies are equally spaced'''
+        return self._step is not None
+
+    @property
+    def weights(self):
+        '''Return trapezoidal integration weights for the energies'''
+        return self._weights
+
+    @property
+    def nbytes(self):
+        '''Return memory needed for one spectrum on this grid'''
+        return self._energies.nbytes
+
+    def integrate(self, values):
+        '''Integrate values (along their last axis) over the grid'''
+        return numpy.dot(values, self._weights)
+
+    def __len__(self):
+        return len(self._energies)
+
+    def __getitem__(self, key):
+        return self._energies[key]
+
+    def __iter__(self):
+        return iter(self._energies)
+
+    def __array__(self, dtype=None):
+        '''Allow grids to be used wherever numpy arrays are expected'''
+        if dtype is None:
+            return self._energies
+        return self._energies.astype(dtype)
+
+    def __hash__(self):
+        return self._hash
+
+    def __eq__(self, other):
+        '''Check if two grids have identical energies'''
+        if self is other:
+            return True
+        if not isinstance(other, EnergyGrid):
+            return False
+        return (self._hash == other._hash
+                and numpy.array_equal(self._energies, other._energies))
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __repr__(self):
+        return 'EnergyGrid(%d energies, %g to %g)' % (
+            len(self._energies), self._energies[0], self._energies[-1])
+
+# Grids recently made from float arrays, by array id, with the array
+# (so that its id is not reused) and a copy of its contents.  See
+# as_energy_grid().
+_recent_grids_size = 8
+_recent_grids = {}
+
+def as_energy_grid(energies):
+    '''Return energies as an EnergyGrid, wrapping arrays if needed.  The
+       grids of the last few arrays are kept, so that passing the same
+       array again is cheap.'''
+    if isinstance(energies, EnergyGrid):
+        return energies
+    if not isinstance(energies, numpy.ndarray) or energies.dtype != float:
+        return EnergyGrid(energies)
+    (array, contents, grid) = _recent_grids.get(id(energies),
+                                                (None, None, None))
+    # Check the contents too, as the array may have been modified
+    if array is energies and energies.tostring() == contents:
+        return grid
+    grid = EnergyGrid(energies)
+    if len(_recent_grids) >= _recent_grids_size:
+        _recent_grids.clear()
+    _recent_grids[id(energies)] = (energies, energies.tostring(), grid)
+    return grid
+
+##########################################################################
+
+# Default budget for each SpectrumCache, and for all of them together.
+# See set_cache_budget().
+default_max_entries = 4
+default_max_bytes = 16 * 2**20
+default_max_total_bytes = 256 * 2**20
+
+# Cache entries record when they were last used by this counter
+_clock = itertools.count()
+
+class CacheBudget(object):
+    '''Memory budget shared by many spectrum caches.  When their entries
+       together exceed max_bytes, entries are evicted in order of least
+       recent use across all caches.  (Approximately: entries are queued
+       when added, and an entry used since it was queued is queued again
+       rather than evicted, so that cache hits need not update the
+       queue.)
+    '''
+    def __init__(self, max_bytes):
+        '''Constructor'''
+        from collections import OrderedDict
+        self._max_bytes = max_bytes
+        self._nbytes = 0
+        # (cache id, grid) -> (cache weak reference, bytes, time queued)
+        self._queue = OrderedDict()
+        self._lock = threading.Lock()
+        return
+
+    @property
+    def max_bytes(self):
+        '''Return the total memory allowed for cached spectra'''
+        return self._max_bytes
+
+    @property
+    def nbytes(self):
+        '''Return the total memory used by cached spectra'''
+        return self._nbytes
+
+    def set_max_bytes(self, max_bytes):
+        '''Change the budget, evicting entries if needed'''
+        self._max_bytes = max_bytes
+        self._trim()
+        return
+
+    def charge(self, cache, grid, nbytes, time):
+        '''Record a new entry of cache, evicting entries if needed'''
+        with self._lock:
+            self._queue[(id(cache), grid)] = (weakref.ref(cache), nbytes,
+                                              time)
+            self._nbytes += nbytes
+        self._trim()
+        return
+
+    def release(self, cache, grid):
+        '''Forget an entry removed from cache'''
+        with self._lock:
+            (ref, nbytes, time) = self._queue.pop((id(cache), grid),
+                                                  (None, 0, None))
+            self._nbytes -= nbytes
+        return
+
+    def _trim(self):
+        '''Evict least recently used entries while over budget'''
+        while True:
+            with self._lock:
+                if self._nbytes <= self._max_bytes or not self._queue:
+                    return
+                (key, (ref, nbytes, time)) = self._queue.popitem(last=False)
+                cache = ref()
+                last_used = None
+                if cache is not None:
+                    last_used = cache._last_used(key[1])
+                if last_used is not None and last_used > time:
+                    # Used since queued: give it another turn
+                    self._queue[key] = (ref, nbytes, last_used)
+                    continue
+                self._nbytes -= nbytes
+            if cache is not None:
+                cache._evict(key[1])
+
+shared_budget = CacheBudget(default_max_total_bytes)
+
+def set_cache_budget(max_entries=None, max_bytes=None, max_total_bytes=None):
+    '''Set the default size limits of spectrum caches created later, and
+       the memory limit shared by all caches'''
+    global default_max_entries, default_max_bytes
+    if max_entries is not None:
+        default_max_entries = max_entries
+    if max_bytes is not None:
+        default_max_bytes = max_bytes
+    if max_total_bytes is not None:
+        shared_budget.set_max_bytes(max_total_bytes)
+    return
+
+class SpectrumCache(object):
+    '''A small least-recently-used cache of spectra keyed by EnergyGrid,
+       bounded both in number of entries and total bytes, and sharing a
+       CacheBudget with other caches.
+    '''
+    def __init__(self, max_entries=None, max_bytes=None, budget=None):
+        '''Constructor.  Limits default to the module-level budget, and
+           the shared budget to shared_budget.'''
+        if max_entries is None:
+            max_entries = default_max_entries
+        if max_bytes is None:
+            max_bytes = default_max_bytes
+        if budget is None:
+            budget = shared_budget
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._budget = budget
+        # grid -> [value, bytes, time last used]
+        self._entries = {}
+        self._nbytes = 0
+        return
+
+    def __del__(self):
+        # Return this cache's share of the shared budget
+        for grid in self._entries.keys():
+            self._budget.release(self, grid)
+
+    @property
+    def nbytes(self):
+        '''Return the memory used by cached spectra'''
+        return self._nbytes
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, grid):
+        '''Return cached value for this grid, or None'''
+        entry = self._entries.get(grid)
+        if entry is None:
+            return None
+        entry[2] = next(_clock)
+        return entry[0]
+
+    def put(self, grid, value):
+        '''Add value for this grid, evicting least recently used values'''
+        self.discard(grid)
+        nbytes = numpy.asarray(value).nbytes
+        if (nbytes > self._max_bytes or nbytes > self._budget.max_bytes
+            or self._max_entries < 1):
+            return
+        while (len(self._entries) >= self._max_entries
+               or self._nbytes + nbytes > self._max_bytes):
+            self.discard(min(self._entries,
+                             key=lambda key: self._entries[key][2]))
+        time = next(_clock)
+        self._entries[grid] = [value, nbytes, time]
+        self._nbytes += nbytes
+        self._budget.charge(self, grid, nbytes, time)
+        return
+
+    def discard(self, grid):
+        '''Remove value for this grid, if present'''
+        if self._evict(grid):
+            self._budget.release(self, grid)
+        return
+
+    def clear(self):
+        '''Remove all cached values'''
+        for grid in self._entries.keys():
+            self.discard(grid)
+        return
+
+    def _last_used(self, grid):
+        '''Return when the value for this grid was last used, or None'''
+        entry = self._entries.get(grid)
+        if entry is None:
+            return None
+        return entry[2]
+
+    def _evict(self, grid):
+        '''Remove value for this grid, if present, without updating the
+           shared budget.  Returns whether a value was removed.'''
+        entry = self._entries.pop(grid, None)
+        if entry is None:
+            return False
+        self._nbytes -= entry[1]
+        return True
+
+##########################################################################
@@ -0,0 +1,40 @@
+from oklo.utils.betadecay import BetaBranchTable
+import numpy
+##########################################################################
+
+def compute_all_spectra(network, energies, workers=None, fermi_table=None):
+    '''Calculate the antineutrino spectrum of every beta decay in the
+    network, sharding the decays over a pool of worker processes.
+    Returns the list of reaction ids, and the (decays x energies)
+    spectrum matrix in the same order.  By default, one worker is used
+    per CPU.  The Fermi function is taken from fermi_table (a
+    FermiTable), if given.'''
+    import multiprocessing
+    table = BetaBranchTable.from_network(network)
+    energies = numpy.array(energies, dtype=float)
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+    if workers <= 1 or table.n_decays() <= 1:
+        return (table.reaction_ids,
+                table.decay_antineutrino_spectra(energies, fermi_table))
+    # Several shards per worker, to even out load across processes
+    shards = table.split(4*workers)
+    pool = multiprocessing.Pool(processes=workers)
+    try:
+        results = pool.map(_shard_spectra,
+                           [(shard, energies, fermi_table)
+                            for shard in shards])
+    finally:
+        pool.close()
+        pool.join()
+    spectra = numpy.zeros((table.n_decays(), len(energies)))
+    for (shard, shard_spectra) in zip(shards, results):
+        spectra[shard.reaction_ids] = shard_spectra
+    return (table.reaction_ids, spectra)
+
+def _shard_spectra(args):
+    '''Worker: calculate decay spectra for one shard'''
+    (shard, energies, fermi_table) = args
+    return shard.decay_antineutrino_spectra(energies, fermi_table)
+
+##########################################################################
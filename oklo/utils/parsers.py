@@ -1,34 +1,144 @@
-from oklo.core.ids import NuclideId
-from oklo.core.units import seconds, keV, eV
+from oklo.core.ids import NuclideId, NuclideIdArray
+from oklo.core.units import seconds, keV, eV, amu
+import numpy
 ##########################################################################
 
-def parse_mass_eval_table(filename):
-    '''Parse the Atomic Mass Evaluation table, and generate appropriate
-    data for each nuclide.'''
+# Fixed-width columns of the Atomic Mass Evaluation table: (name, first,
+# last) character positions.  Atomic masses are split into whole micro-u
+# (millions) and the remainder.
+_mass_eval_columns = [('Z', 9, 14),
+                      ('A', 14, 19),
+                      ('mass_excess', 27, 41),
+                      ('mass_excess_unc', 41, 52),
+                      ('binding_energy', 52, 63),
+                      ('binding_energy_unc', 63, 72),
+                      ('beta_decay_energy', 75, 86),
+                      ('beta_decay_energy_unc', 86, 95),
+                      ('atomic_mass_u', 96, 99),
+                      ('atomic_mass_micro_u', 100, 112),
+                      ('atomic_mass_unc', 112, 123)]
+_mass_eval_width = 123
+
+# Columns of the structured array returned by read_mass_eval_table.
+# Energies are in MeV (keV in the table); binding energy is per nucleon.
+mass_eval_dtype = numpy.dtype([('Z', numpy.int64),
+                               ('A', numpy.int64),
+                               ('mass_excess', float),
+                               ('mass_excess_unc', float),
+                               ('estimated', bool),
+                               ('binding_energy', float),
+                               ('binding_energy_unc', float),
+                               ('beta_decay_energy', float),
+                               ('beta_decay_energy_unc', float),
+                               ('atomic_mass', float),
+                               ('atomic_mass_unc', float)])
+
+# Text columns needed for each column of the structured array, where
+# not the column of the same name
+_mass_eval_sources = {'estimated':['mass_excess'],
+                      'atomic_mass':['atomic_mass_u', 'atomic_mass_micro_u']}
+
+def read_mass_eval_table(filename, names=None):
+    '''Read the Atomic Mass Evaluation table into a numpy structured
+    array (see mass_eval_dtype), converting all values at once.  Only the
+    columns in names are read, if given.  Values estimated from
+    systematics ('#' in place of the decimal point) are flagged in the
+    'estimated' column, for the mass excess.  Values which are not
+    calculable ('*') are NaN.'''
     import pkg_resources
+    import string
     if not pkg_resources.resource_exists('oklo',filename):
         raise ValueError('Mass evaluation file "%s" does not exist' % (
             filename))
-    datafile = pkg_resources.resource_stream('oklo',filename)
-    datalines = datafile.readlines()
+    if names is None:
+        names = mass_eval_dtype.names
+    dtype = numpy.dtype([(name, mass_eval_dtype[name])
+                         for name in mass_eval_dtype.names if name in names])
+    datalines = pkg_resources.resource_string('oklo',filename).splitlines()
     # Skip header lines
     n_header_lines = 39
-    datalines = datalines[n_header_lines:]
-    # Parse each line, and generate nuclide data
-    nuclides_data = []
-    for line in datalines:
-        nucl_Z = int(line[9:14])
-        nucl_A = int(line[14:19])
-        mass_excess = float(line[27:41].strip().strip('#')) * keV
-        #beta_decay_energy = None
-        #bde_string = line[75:86].strip().strip('#').strip('*')
-        #if len(bde_string)>0:
-        #    beta_decay_energy = float(bde_string) * keV
-        # Collate data
-        nuclide_data = {'id' : NuclideId(Z=nucl_Z,A=nucl_A),
-                        'mass_excess' : mass_excess}
-        nuclides_data.append(nuclide_data)
-    return nuclides_data
+    datalines = [line for line in datalines[n_header_lines:] if line.strip()]
+    # Lines as a (lines x characters) matrix, padded with NUL characters
+    chars = numpy.array(datalines, dtype='S%d' % _mass_eval_width).view(
+        numpy.uint8).reshape((len(datalines), _mass_eval_width))
+    table = numpy.zeros(len(datalines), dtype=dtype)
+    if 'estimated' in dtype.names:
+        (first, last) = [(first, last) for (name, first, last)
+                         in _mass_eval_columns if name == 'mass_excess'][0]
+        table['estimated'] = (chars[:, first:last] == ord('#')).any(axis=1)
+    # Read estimated values as measured ones, and not calculable ones and
+    # padding as blank, translating the whole text at once
+    chars = numpy.frombuffer(
+        chars.tostring().translate(string.maketrans('#*\0', '.  ')),
+        dtype=numpy.uint8).reshape(chars.shape)
+    sources = set()
+    for name in dtype.names:
+        sources.update(_mass_eval_sources.get(name, [name]))
+    columns = [column for column in _mass_eval_columns
+               if column[0] in sources]
+    values = dict(zip([name for (name, first, last) in columns],
+                      _fixed_width_floats(chars, [(first, last) for
+                                                  (name, first, last)
+                                                  in columns]).T))
+    for name in ('Z', 'A'):
+        if name in dtype.names:
+            table[name] = values[name]
+    for name in ('mass_excess', 'mass_excess_unc', 'binding_energy',
+                 'binding_energy_unc', 'beta_decay_energy',
+                 'beta_decay_energy_unc'):
+        if name in dtype.names:
+            table[name] = values[name] * keV
+    # Atomic mass, in micro-u, converted to energy
+    if 'atomic_mass' in dtype.names:
+        micro_u = (values['atomic_mass_u'] * 1e6
+                   + values['atomic_mass_micro_u'])
+        table['atomic_mass'] = micro_u * 1e-6 * amu
+    if 'atomic_mass_unc' in dtype.names:
+        table['atomic_mass_unc'] = values['atomic_mass_unc'] * 1e-6 * amu
+    return table
+
+def _fixed_width_floats(chars, columns):
+    '''Convert fixed-width columns, each at characters [first, last) of a
+    (lines x characters) matrix, to a (lines x columns) array of floats.
+    Blank values are NaN.'''
+    width = max([last - first for (first, last) in columns]) + 1
+    # Each value on its own, padded with spaces, and 'nan' if blank
+    fields = numpy.empty((len(chars), len(columns), width), dtype=numpy.uint8)
+    fields.fill(ord(' '))
+    for (idx, (first, last)) in enumerate(columns):
+        fields[:, idx, :last-first] = chars[:, first:last]
+    fields = fields.reshape((-1, width))
+    fields[(fields == ord(' ')).all(axis=1), :3] = numpy.frombuffer(
+        'nan', dtype=numpy.uint8)
+    values = fields.tostring().split()
+    if len(values) != len(fields):
+        raise ValueError('Unexpected text in mass evaluation table')
+    return numpy.array(map(float, values)).reshape((len(chars),
+                                                     len(columns)))
+
+def parse_mass_eval_table(filename):
+    '''Parse the Atomic Mass Evaluation table, and generate appropriate
+    data for each nuclide.'''
+    table = read_mass_eval_table(filename, ['Z', 'A', 'mass_excess'])
+    nucl_ids = NuclideIdArray.from_zam(table['Z'], table['A']).nuclide_ids()
+    return [{'id' : nucl_id,
+             'mass_excess' : mass_excess}
+            for (nucl_id, mass_excess) in zip(
+                nucl_ids, table['mass_excess'].tolist())]
+
+# Increment when the output of parse_mass_eval_arrays changes
+mass_eval_arrays_version = 2
+
+def parse_mass_eval_arrays(filenames):
+    '''Parse Atomic Mass Evaluation tables into arrays of nuclide ID
+    integers, and of each column of the tables (see mass_eval_dtype, and
+    oklo.utils.datacache).'''
+    table = numpy.concatenate([read_mass_eval_table(filename)
+                               for filename in filenames])
+    arrays = {'id': NuclideIdArray.from_zam(table['Z'], table['A']).ids}
+    for name in mass_eval_dtype.names:
+        arrays[name] = table[name]
+    return arrays
 
 ##########################################################################
 
@@ -115,6 +225,26 @@ def parse_yields_ENDFB(filenames):
     # Return final data
     return yields_by_parent
 
+# Increment when the output of parse_yields_ENDFB_arrays changes
+yields_ENDFB_arrays_version = 1
+
+def parse_yields_ENDFB_arrays(filenames):
+    '''Parse ENDF/B fission yield files into flat arrays of (parent,
+    daughter) nuclide ID integers and cumulative yields (see
+    oklo.utils.datacache).'''
+    yields_by_parent = parse_yields_ENDFB(filenames)
+    rows = []
+    for (parent_id, yields) in sorted(yields_by_parent.items()):
+        for (daught_id, daught_yield) in sorted(yields.items()):
+            rows.append((parent_id, daught_id, daught_yield['cumulative'],
+                         daught_yield['cumulative_unc']))
+    return {
+        'parent': NuclideIdArray([row[0] for row in rows]).ids,
+        'daughter': NuclideIdArray([row[1] for row in rows]).ids,
+        'cumulative': numpy.array([row[2] for row in rows], dtype=float),
+        'cumulative_unc': numpy.array([row[3] for row in rows], dtype=float),
+    }
+
 def convertENDFField( data ):
     # Convert ENDF formatted number to actual value
     dataBase = 0.0
@@ -190,3 +320,39 @@ def parse_decays_ENDF(filenames):
             break
     #print '  parse_decays_ENDF: Processed %d decays.' % (len(decay_infos))
     return decay_infos
+
+# Increment when the output of parse_decays_ENDF_arrays changes
+decays_ENDF_arrays_version = 1
+
+def parse_decays_ENDF_arrays(filenames):
+    '''Parse ENDF beta decay data files into arrays (see
+    oklo.utils.datacache).  Decay quantities have one entry per decay,
+    and 'branch_*' quantities one entry per branch, grouped by decay
+    with 'n_branches' entries for each decay.'''
+    decay_infos = parse_decays_ENDF(filenames)
+    branch_infos = []
+    for decay_info in decay_infos:
+        branch_infos.extend(decay_info['branch_infos'])
+    arrays = {}
+    for (name, key, dtype) in [('Z', 'Z', int),
+                               ('A', 'A', int),
+                               ('M', 'M', int),
+                               ('half_life', 'half_life', float),
+                               ('q_value', 'Q', float),
+                               ('e0_max', 'E0max', float)]:
+        arrays[name] = numpy.array([decay_info[key]
+                                    for decay_info in decay_infos],
+                                   dtype=dtype)
+    arrays['n_branches'] = numpy.array([len(decay_info['branch_infos'])
+                                        for decay_info in decay_infos],
+                                       dtype=int)
+    for (key, dtype) in [('e0', float),
+                         ('sigma_e0', float),
+                         ('fraction', float),
+                         ('sigma_fraction', float),
+                         ('forbiddeness', int)]:
+        arrays['branch_'+key] = numpy.array([branch_info[key]
+                                             for branch_info in branch_infos],
+                                            dtype=dtype)
+    return arrays
+
@@ -0,0 +1,217 @@
+from oklo.core.ids import ReactionId, NuclideIdArray
+from oklo.core.defs import ReactionType
+from oklo.core.units import MeV
+from oklo.utils.betadecay import BetaBranchTable
+from oklo.utils.energygrid import as_energy_grid
+import numpy
+##########################################################################
+
+class ReactorSpectrumBasis:
+    '''Antineutrino (and electron) spectrum per fission of each fissile
+       parent.
+
+       Built once from a reaction network populated with cumulative
+       fission yields and beta decay spectra.  The reactor spectrum for
+       any set of fission fractions is then a single matrix product.
+    '''
+    def __init__(self, network, energies, fission_parents,
+                 threshold=1.8*MeV, store=None, fermi_table=None,
+                 electron=False, chart=None):
+        '''Constructor.  Energies are an array or EnergyGrid.  Fission
+           daughters whose beta decay is known to be below the threshold
+           energy are not included.  Decay spectra are
+           read from the SpectrumStore, if provided and applicable, and
+           otherwise calculated using fermi_table (a FermiTable), if
+           provided.  If electron is set, electron spectra are calculated
+           in the same pass as antineutrino spectra; otherwise, on first
+           use.  Nuclide masses for the threshold are looked up in chart
+           (a NuclideChart), the network's chart if not provided.'''
+        self._grid = as_energy_grid(energies)
+        self._energies = self._grid.energies
+        self._fission_parents = list(fission_parents)
+        self._threshold = threshold
+        self._daughter_ids = []
+        self._reaction_ids = []
+        self._yields = None
+        self._has_spectrum = None
+        self._matrix = None
+        self._electron_matrix = None
+        self._fermi_table = fermi_table
+        self._decays = []
+        self._build(network, store, fermi_table, electron, chart)
+        return
+
+    @property
+    def energies(self):
+        '''Return the energies at which the basis spectra are evaluated'''
+        return self._energies
+
+    @property
+    def grid(self):
+        '''Return the EnergyGrid of the basis energies'''
+        return self._grid
+
+    @property
+    def fission_parents(self):
+        '''Return the fissile parent nuclide ids, in basis order'''
+        return self._fission_parents
+
+    @property
+    def daughter_ids(self):
+        '''Return the ids of the fission daughters above threshold'''
+        return self._daughter_ids
+
+    @property
+    def reaction_ids(self):
+        '''Return the beta decay reaction ids of the fission daughters'''
+        return self._reaction_ids
+
+    @property
+    def yields(self):
+        '''Return cumulative yields as a (daughters x parents) matrix'''
+        return self._yields
+
+    @property
+    def has_spectrum(self):
+        '''Return mask of the fission daughters with known decay spectra'''
+        return self._has_spectrum
+
+    @property
+    def matrix(self):
+        '''Return the basis spectra as a (parents x energies) matrix'''
+        return self._matrix
+
+    @property
+    def electron_matrix(self):
+        '''Return the electron basis spectra as a (parents x energies)
+           matrix'''
+        if self._electron_matrix is None:
+            table = BetaBranchTable.from_decays(self._decays)
+            decay_spectra = table.decay_electron_spectra(self._energies,
+                                                         self._fermi_table)
+            self._electron_matrix = numpy.dot(
+                self._yields[self._has_spectrum].T, decay_spectra)
+        return self._electron_matrix
+
+    def fraction_vector(self, fission_fractions):
+        '''Convert fission fractions to an array in basis order.  Accepts
+           a dictionary by parent nuclide id, or an array whose last axis
+           follows the order of fission_parents.'''
+        if isinstance(fission_fractions, dict):
+            return numpy.array([fission_fractions.get(parent, 0)
+                                for parent in self._fission_parents],
+                               dtype=float)
+        fractions = numpy.asarray(fission_fractions, dtype=float)
+        if fractions.shape[-1] != len(self._fission_parents):
+            raise ValueError('Expected %d fission fractions, got %d' % (
+                len(self._fission_parents), fractions.shape[-1]))
+        return fractions
+
+    def spectrum(self, fission_fractions):
+        '''Return the antineutrino spectrum per fission.  A 2-D array of
+           fractions (steps x parents) returns one spectrum per step.'''
+        return numpy.dot(self.fraction_vector(fission_fractions),
+                         self._matrix)
+
+    def electron_spectrum(self, fission_fractions):
+        '''Return the electron (beta) spectrum per fission, at the basis
+           energies taken as electron kinetic energies'''
+        return numpy.dot(self.fraction_vector(fission_fractions),
+                         self.electron_matrix)
+
+    def decay_rates(self, fission_fractions):
+        '''Return the equilibrium decay rate of each fission daughter'''
+        return numpy.dot(self.fraction_vector(fission_fractions),
+                         self._yields.T)
+
+    def missing_decays(self, fission_fractions):
+        '''Return the decays without spectral data, by decreasing rate'''
+        decay_rates = self.decay_rates(fission_fractions)
+        missing = []
+        for idx in numpy.flatnonzero(~self._has_spectrum
+                                     & (decay_rates != 0)):
+            missing.append({'reac_id':self._reaction_ids[idx],
+                            'decay_rate':decay_rates[idx]})
+        return sorted(missing, key=lambda elem: elem['decay_rate'],
+                      reverse=True)
+
+    def sampler(self, fission_fractions, points=1025):
+        '''Return a BetaDecaySampler over the fission daughter decays
+           with known spectra, weighted by their equilibrium decay rates
+           (see oklo.utils.sampling)'''
+        from oklo.utils.sampling import BetaDecaySampler
+        decay_rates = self.decay_rates(fission_fractions)
+        return BetaDecaySampler(self._decays,
+                                decay_rates[self._has_spectrum], points)
+
+    def _build(self, network, store, fermi_table, electron, chart):
+        '''Collect fission daughters and sum their spectra per parent'''
+        yields = []
+        candidates = []
+        # Only consider known fission daughters
+        for nuclide in network.nuclides_with('cumulative_yield'):
+            cumulative_yield = nuclide['cumulative_yield']
+            nuclide_yields = [cumulative_yield.get(parent, 0)
+                              for parent in self._fission_parents]
+            if not any(nuclide_yields): continue
+            candidates.append(nuclide.id)
+            yields.append(nuclide_yields)
+        # Drop daughters whose beta decay is below threshold, for all
+        # daughters at once
+        candidates = NuclideIdArray(candidates)
+        above = self._above_threshold(network, candidates, chart)
+        has_spectrum = []
+        decays = []
+        for (nucl_id, keep) in zip(candidates, above.tolist()):
+            if not keep: continue
+            beta_decay_id = ReactionId(init_nucl_id=nucl_id,
+                                       reac_type=ReactionType.BetaDecay)
+            beta_decay = None
+            if network.has_id(beta_decay_id):
+                beta_reaction = network.get(beta_decay_id)
+                if beta_reaction.has_key('beta_decay'):
+                    beta_decay = beta_reaction['beta_decay']
+            self._daughter_ids.append(nucl_id)
+            self._reaction_ids.append(beta_decay_id)
+            has_spectrum.append(beta_decay is not None)
+            if beta_decay is not None:
+                decays.append(beta_decay)
+        yields = [nuclide_yields for (nuclide_yields, keep)
+                  in zip(yields, above.tolist()) if keep]
+        self._yields = numpy.array(yields, dtype=float).reshape(
+            (len(yields), len(self._fission_parents)))
+        self._has_spectrum = numpy.array(has_spectrum, dtype=bool)
+        self._decays = decays
+        # Sum decay spectra, weighted by yield, for each fissile parent
+        decay_ids = [decay.reaction_id for decay in decays]
+        if (store is not None and store.matches(self._grid)
+            and all([store.has_id(decay_id) for decay_id in decay_ids])):
+            decay_spectra = store.spectra[store.rows(decay_ids)]
+        else:
+            table = BetaBranchTable.from_decays(decays)
+            if electron:
+                (decay_electron_spectra,
+                 decay_spectra) = table.decay_beta_spectra(self._energies,
+                                                           fermi_table)
+                self._electron_matrix = numpy.dot(
+                    self._yields[self._has_spectrum].T,
+                    decay_electron_spectra)
+            else:
+                decay_spectra = table.decay_antineutrino_spectra(
+                    self._energies, fermi_table)
+        self._matrix = numpy.dot(self._yields[self._has_spectrum].T,
+                                 decay_spectra)
+        return
+
+    def _above_threshold(self, network, nucl_ids, chart):
+        '''Return mask of nuclides whose beta decay is not known to be
+           energetically below the threshold'''
+        if chart is None:
+            chart = network.nuclide_chart()
+        (final_nucl_ids, q_values, allowed) = chart.q_values(
+            ReactionType.BetaDecay, nucl_ids)
+        # Unknown (NaN) Q-values are kept
+        with numpy.errstate(invalid='ignore'):
+            return ~(q_values < self._threshold)
+
+##########################################################################
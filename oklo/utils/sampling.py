@@ -0,0 +1,153 @@
+import numpy
+##########################################################################
+# Monte Carlo sampling of beta decays
+#
+# Random number generators may be a numpy.random.Generator (numpy 1.17
+# and later) or a numpy.random.RandomState.  Pass a seeded generator
+# for reproducible results; see make_rng().
+
+def make_rng(seed=None):
+    '''Return a new random number generator with the given seed'''
+    if hasattr(numpy.random, 'default_rng'):
+        return numpy.random.default_rng(seed)
+    return numpy.random.RandomState(seed)
+
+def _uniform(rng, size):
+    '''Return uniform random numbers in [0, 1) from either generator type'''
+    if hasattr(rng, 'random_sample'):
+        return rng.random_sample(size)
+    return rng.random(size)
+
+##########################################################################
+
+class AliasTable:
+    '''Walker/Vose alias table, for sampling indices in proportion to a
+       fixed set of non-negative weights in constant time per sample.
+    '''
+    def __init__(self, weights):
+        '''Constructor'''
+        weights = numpy.asarray(weights, dtype=float)
+        if weights.ndim != 1 or len(weights) == 0:
+            raise ValueError('Alias table requires a list of weights')
+        if (weights < 0).any() or weights.sum() <= 0:
+            raise ValueError('Alias table weights must be non-negative, '
+                             'with a positive sum')
+        n_entries = len(weights)
+        scaled = weights * (n_entries / weights.sum())
+        self._probability = numpy.ones(n_entries)
+        self._alias = numpy.arange(n_entries)
+        small = list(numpy.flatnonzero(scaled < 1))
+        large = list(numpy.flatnonzero(scaled >= 1))
+        while small and large:
+            less = small.pop()
+            more = large.pop()
+            self._probability[less] = scaled[less]
+            self._alias[less] = more
+            scaled[more] -= 1 - scaled[less]
+            if scaled[more] < 1:
+                small.append(more)
+            else:
+                large.append(more)
+        # Entries left over from rounding keep probability one
+        return
+
+    def __len__(self):
+        return len(self._alias)
+
+    def sample(self, size, rng):
+        '''Return an array of sampled indices'''
+        column = numpy.minimum((_uniform(rng, size) * len(self._alias))
+                               .astype(int), len(self._alias) - 1)
+        use_alias = _uniform(rng, size) >= self._probability[column]
+        return numpy.where(use_alias, self._alias[column], column)
+
+##########################################################################
+
+class BetaDecaySampler:
+    '''Sample antineutrino and electron energies from a set of beta
+       decays, weighted by decay rate.
+
+       Each sample first picks a branch, in proportion to decay rate
+       times branching fraction, using an alias table.  The antineutrino
+       energy is then drawn from the branch spectrum by inverting its
+       cumulative distribution (see BetaDecayBranch.antineutrino_cdf),
+       tabulated at equally spaced energies and interpolated linearly.
+       The electron receives the remaining endpoint energy.
+    '''
+    def __init__(self, decays, rates=None, points=1025):
+        '''Constructor.  Decays is a list of BetaDecaySpectrum objects,
+           and rates their relative decay rates (equal by default).'''
+        self._reaction_ids = [decay.reaction_id for decay in decays]
+        if rates is None:
+            rates = numpy.ones(len(decays))
+        rates = numpy.asarray(rates, dtype=float)
+        if len(rates) != len(decays):
+            raise ValueError('Expected %d decay rates, got %d' % (
+                len(decays), len(rates)))
+        decay_index = []
+        e0 = []
+        weights = []
+        cdfs = []
+        grid = numpy.linspace(0, 1, points)
+        for (idx, decay) in enumerate(decays):
+            for branch in decay.branches():
+                cdf = branch.antineutrino_cdf()(branch.e0 * grid)
+                decay_index.append(idx)
+                e0.append(branch.e0)
+                # Skip branches with no spectrum
+                weights.append(rates[idx] * branch.fraction
+                               * (cdf[-1] > 0))
+                cdfs.append(cdf)
+        self._decay_index = numpy.array(decay_index, dtype=int)
+        self._e0 = numpy.array(e0, dtype=float)
+        self._grid = grid
+        self._alias_table = AliasTable(weights)
+        # Offset each branch's distribution by twice its row number, so
+        # one sorted search of the flattened table serves all branches
+        cdfs = numpy.array(cdfs, dtype=float).reshape((-1, points))
+        self._cdf = cdfs
+        self._flat_cdf = (cdfs + 2*numpy.arange(len(cdfs))[:, numpy.newaxis]
+                          ).ravel()
+        return
+
+    @property
+    def reaction_ids(self):
+        '''Return the reaction ids of the decays, in decay index order'''
+        return self._reaction_ids
+
+    def sample(self, size, rng):
+        '''Sample decays.  Returns a dictionary of arrays: the index of
+           the decay and of the branch, and the antineutrino and electron
+           kinetic energies.'''
+        branch = self._alias_table.sample(size, rng)
+        antinu_energy = self._invert_cdf(branch, _uniform(rng, size))
+        return {'decay':self._decay_index[branch],
+                'branch':branch,
+                'antineutrino_energy':antinu_energy,
+                'electron_energy':self._e0[branch] - antinu_energy}
+
+    def antineutrino_energies(self, size, rng):
+        '''Return an array of sampled antineutrino energies'''
+        return self.sample(size, rng)['antineutrino_energy']
+
+    def _invert_cdf(self, branch, probability):
+        '''Return the energy at which each branch's distribution reaches
+           the given probability'''
+        points = len(self._grid)
+        position = numpy.searchsorted(self._flat_cdf, probability + 2*branch,
+                                      side='right') - 1
+        # Stay within each branch's own row of the table
+        position = numpy.clip(position, branch*points,
+                              branch*points + points - 2)
+        knot = position - branch*points
+        cdf_low = self._cdf[branch, knot]
+        cdf_width = self._cdf[branch, knot+1] - cdf_low
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            frac = numpy.where(cdf_width > 0,
+                               (probability - cdf_low) / cdf_width, 0)
+        frac = numpy.clip(frac, 0, 1)
+        return self._e0[branch] * (self._grid[knot]
+                                   + frac*(self._grid[knot+1]
+                                           - self._grid[knot]))
+
+##########################################################################
@@ -0,0 +1,124 @@
+from oklo.utils.betadecay import BetaBranchTable
+from oklo.utils import datacache
+from oklo.utils.energygrid import EnergyGrid, as_energy_grid
+import os
+import hashlib
+import numpy
+##########################################################################
+
+class SpectrumStore:
+    '''Antineutrino spectra of a set of beta decays on one energy grid,
+       persisted as a .npy file and memory-mapped read-only.
+
+       Processes which open the store for the same decays and energies
+       share one copy of the (decays x energies) spectrum matrix through
+       the operating system page cache, instead of each calculating and
+       holding their own.
+    '''
+    # Increment when the spectrum calculation changes
+    version = 2
+
+    def __init__(self, filename, energies, reaction_ids):
+        '''Constructor.  Attach to an existing store file; see open().'''
+        self._filename = filename
+        self._grid = EnergyGrid(energies)
+        self._energies = self._grid.energies
+        self._reaction_ids = list(reaction_ids)
+        self._row_by_id = dict([(reac_id, row) for (row, reac_id)
+                                in enumerate(self._reaction_ids)])
+        self._spectra = numpy.load(filename, mmap_mode='r')
+        if self._spectra.shape != (len(self._reaction_ids),
+                                   len(self._energies)):
+            raise ValueError('Spectrum store "%s" has unexpected shape %r'
+                             % (filename, self._spectra.shape))
+        return
+
+    @classmethod
+    def open(cls, decays, energies, directory=None):
+        '''Attach to the store for this list of BetaDecaySpectrum objects
+           (or BetaBranchTable) and energies, creating it if needed.'''
+        table = decays
+        if not isinstance(decays, BetaBranchTable):
+            table = BetaBranchTable.from_decays(decays)
+        energies = numpy.array(energies, dtype=float)
+        if directory is None:
+            directory = datacache.cache_dir
+        hasher = hashlib.sha1()
+        hasher.update(str(cls.version))
+        hasher.update(table.fingerprint())
+        hasher.update(energies.tostring())
+        filename = os.path.join(directory, 'antinu_spectra_%s.npy' % (
+            hasher.hexdigest()))
+        if not os.path.exists(filename):
+            spectra = table.decay_antineutrino_spectra(energies)
+            _write_matrix(filename, spectra)
+        return cls(filename, energies, table.reaction_ids)
+
+    @property
+    def filename(self):
+        '''Return the file backing this store'''
+        return self._filename
+
+    @property
+    def energies(self):
+        '''Return the energies at which the spectra are evaluated'''
+        return self._energies
+
+    @property
+    def reaction_ids(self):
+        '''Return the reaction ids of the decays, in row order'''
+        return self._reaction_ids
+
+    @property
+    def spectra(self):
+        '''Return the read-only (decays x energies) spectrum matrix'''
+        return self._spectra
+
+    def has_id(self, reaction_id):
+        '''Check if this store holds the spectrum for a reaction'''
+        return reaction_id in self._row_by_id
+
+    @property
+    def grid(self):
+        '''Return the EnergyGrid at which the spectra are evaluated'''
+        return self._grid
+
+    def matches(self, energies):
+        '''Check if the store was evaluated at these energies (an array
+           or EnergyGrid)'''
+        if energies is self._energies:
+            return True
+        return as_energy_grid(energies) == self._grid
+
+    def rows(self, reaction_ids):
+        '''Return the row index of each reaction id'''
+        return numpy.array([self._row_by_id[reac_id]
+                            for reac_id in reaction_ids], dtype=int)
+
+    def spectrum(self, reaction_id):
+        '''Return the spectrum for one reaction, as a read-only view'''
+        return self._spectra[self._row_by_id[reaction_id]]
+
+    def attach(self, decays):
+        '''Make these BetaDecaySpectrum objects read their antineutrino
+           spectra from this store'''
+        for decay in decays:
+            if decay.reaction_id in self._row_by_id:
+                decay.set_spectrum_store(self)
+        return
+
+##########################################################################
+
+def _write_matrix(filename, matrix):
+    '''Write matrix to .npy file, so that readers never see a partial file'''
+    import tempfile
+    directory = os.path.dirname(filename)
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    (tmp_fd, tmp_file) = tempfile.mkstemp(dir=directory, suffix='.npy')
+    with os.fdopen(tmp_fd, 'wb') as tmp:
+        numpy.save(tmp, matrix)
+    os.rename(tmp_file, filename)
+    return
+
+##########################################################################